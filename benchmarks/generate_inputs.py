@@ -0,0 +1,214 @@
+import os
+import sys
+import csv
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.xlsx_writer import StreamingSheetWriter, EXCEL_MAX_ROWS
+from owl_common.triple_writer import TripleWriter, RDFS, OWL, XSD
+
+# excel2owl_properties.py saves its output under this base IRI, so the whole
+# pipeline (and the merge task parents) use it
+BASE_URI = "https://github.com/Tao-AI-group/BSO_AD#"
+IMPORT_URI = "http://example.org/synthetic_import#"
+SHEET_FORMATS = ("auto", "xlsx", "txt")
+
+
+class SyntheticTree:
+    """Random class hierarchy of ``classes`` nodes spread over ``depth`` levels.
+
+    Level sizes double from one level to the next.  Every class below level 1
+    has a primary parent on the level above; a ``multi_parent_ratio`` share of
+    them gets a second one.  Class i is never an ancestor of class j < i.
+    """
+
+    def __init__(self, classes, depth, multi_parent_ratio, rng):
+        weights = [2 ** level for level in range(depth)]
+        sizes = [max(1, classes * w // sum(weights)) for w in weights]
+        sizes[-1] = max(1, classes - sum(sizes[:-1]))
+
+        self.level = []
+        self.parents = []
+        previous = []
+        for level, size in enumerate(sizes, 1):
+            current = list(range(len(self.level), len(self.level) + size))
+            for _ in current:
+                self.level.append(level)
+                if not previous:
+                    self.parents.append([])
+                    continue
+                parents = [rng.choice(previous)]
+                if len(previous) > 1 and rng.random() < multi_parent_ratio:
+                    extra = rng.choice(previous)
+                    if extra != parents[0]:
+                        parents.append(extra)
+                self.parents.append(parents)
+            previous = current
+
+    def __len__(self):
+        return len(self.level)
+
+    def chain(self, node):
+        # node and its primary ancestors, top level first
+        path = [node]
+        while self.parents[path[-1]]:
+            path.append(self.parents[path[-1]][0])
+        return path[::-1]
+
+    def row_count(self):
+        return sum(max(1, len(parents)) for parents in self.parents)
+
+
+def class_label(node):
+    return f"Class_{node}"
+
+
+def write_class_sheet(path, tree, depth):
+    # level_N / level_N definition layout: one row per (class, parent) edge,
+    # the class's own row (with its definition) always first
+    header = []
+    for level in range(1, depth + 1):
+        header += [f"level_{level}", f"level_{level} definition"]
+
+    def rows():
+        for node in range(len(tree)):
+            for index, parent in enumerate(tree.parents[node] or [None]):
+                path = (tree.chain(parent) if parent is not None else []) + [node]
+                row = [""] * len(header)
+                for level, member in enumerate(path):
+                    row[2 * level] = class_label(member)
+                if index == 0:
+                    row[2 * len(path) - 1] = f"Synthetic definition of {class_label(node)}."
+                yield row
+
+    if path.lower().endswith(".xlsx"):
+        if tree.row_count() >= EXCEL_MAX_ROWS:
+            raise ValueError(f"{tree.row_count()} rows do not fit one worksheet; write the class sheet as .txt")
+        with StreamingSheetWriter(path, header) as writer:
+            for row in rows():
+                writer.writerow(row)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter="\t")
+            writer.writerow(header)
+            writer.writerows(rows())
+
+
+def write_relation_sheet(path, tree, relations, rng):
+    # name/property/domain/range layout; names repeat so existing properties are reused
+    names = max(1, relations // 4)
+    header = ["name", "property", "domain", "range"]
+
+    def rows():
+        for i in range(relations):
+            number = rng.randrange(names)
+            domain = class_label(rng.randrange(len(tree)))
+            if number % 2:
+                yield [f"hasDataValue{number}", "data property", domain, rng.choice(["xsd:string", "xsd:float", "xsd:integer"])]
+            else:
+                yield [f"hasRelation{number}", "object property", domain, class_label(rng.randrange(len(tree)))]
+
+    if path.lower().endswith(".xlsx"):
+        with StreamingSheetWriter(path, header) as writer:
+            for row in rows():
+                writer.writerow(row)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, delimiter="\t")
+            writer.writerow(header)
+            writer.writerows(rows())
+
+
+def branch_roots(tree, count):
+    # Disjoint level-2 branches (level 1 when the tree has a single level)
+    level = 2 if 2 in tree.level else 1
+    return [node for node in range(len(tree)) if tree.level[node] == level][:count]
+
+
+def write_import_ontology(path, tree, rng, roots, properties=20):
+    # RDF/XML import ontology with labels, comments, a custom annotation and
+    # object/data properties; half of them point into the merged branches so
+    # the merge keeps them, the rest are rejected
+    with open(path, "w", encoding="utf-8") as f:
+        writer = TripleWriter(f, "rdfxml", IMPORT_URI)
+        writer.begin()
+        writer.write(IMPORT_URI[:-1], OWL + "Ontology")
+        writer.write(IMPORT_URI + "code", OWL + "AnnotationProperty")
+        for i in range(properties):
+            pool = roots if i % 4 < 2 and roots else range(len(tree))
+            domain = IMPORT_URI + f"C{rng.choice(pool)}"
+            if i % 2:
+                writer.write(IMPORT_URI + f"value{i}", OWL + "DatatypeProperty",
+                             [(RDFS + "domain", domain, True), (RDFS + "range", XSD + "string", True)])
+            else:
+                writer.write(IMPORT_URI + f"linked{i}", OWL + "ObjectProperty",
+                             [(RDFS + "domain", domain, True),
+                              (RDFS + "range", IMPORT_URI + f"C{rng.choice(pool)}", True)])
+        for node in range(len(tree)):
+            statements = [(RDFS + "subClassOf", IMPORT_URI + f"C{parent}", True) for parent in tree.parents[node]]
+            statements += [(RDFS + "label", f"Import class {node}", False),
+                           (RDFS + "comment", f"Synthetic import class {node} on level {tree.level[node]}.", False),
+                           (IMPORT_URI + "code", f"SYN{node:07d}", False)]
+            writer.write(IMPORT_URI + f"C{node}", OWL + "Class", statements)
+        writer.end()
+
+
+def write_merge_tasks(path, roots, base_parent_iri):
+    merge_tasks = [{"import_class_iri": IMPORT_URI + f"C{node}",
+                    "base_parent_iri": base_parent_iri,
+                    "output_file": f"merged_task_{i}.owl"} for i, node in enumerate(roots, 1)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(merge_tasks, f, indent=2)
+
+
+def generate_inputs(output_dir, classes, depth=8, multi_parent_ratio=0.05, relations=1000, import_classes=None,
+                    tasks=3, seed=0, sheet_format="auto"):
+    """Write every synthetic input of the benchmark into ``output_dir``.
+
+    Returns a dict of paths: ``classes`` (level_N sheet), ``relations``
+    (name/property/domain/range sheet), ``import`` (RDF/XML import ontology)
+    and ``tasks`` (merge task JSON).  ``sheet_format`` "auto" uses xlsx
+    while the class sheet fits one worksheet and TXT beyond that.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    tree = SyntheticTree(classes, depth, multi_parent_ratio, rng)
+    import_tree = SyntheticTree(import_classes or classes, depth, multi_parent_ratio, rng)
+
+    if sheet_format == "auto":
+        sheet_format = "xlsx" if tree.row_count() < EXCEL_MAX_ROWS else "txt"
+    paths = {
+        "classes": os.path.join(output_dir, f"classes.{sheet_format}"),
+        "relations": os.path.join(output_dir, f"relations.{sheet_format}"),
+        "import": os.path.join(output_dir, "import.owl"),
+        "tasks": os.path.join(output_dir, "merge_tasks.json"),
+    }
+    write_class_sheet(paths["classes"], tree, depth)
+    write_relation_sheet(paths["relations"], tree, relations, rng)
+    roots = branch_roots(import_tree, tasks)
+    write_import_ontology(paths["import"], import_tree, rng, roots)
+    # excel2owl numbers classes in sheet order, so Class_0 becomes BASE_URI + "00000"
+    write_merge_tasks(paths["tasks"], roots, BASE_URI + "00000")
+    print(f"Generated {len(tree)} classes ({tree.row_count()} rows), {relations} relation rows and "
+          f"an import ontology of {len(import_tree)} classes in: {output_dir}")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic class/relation sheets, an import ontology and merge tasks.")
+    parser.add_argument("-o", "--output_dir", required=True, help="Directory for the generated files")
+    parser.add_argument("-n", "--classes", type=int, default=10000, help="Number of classes in the class sheet (default: 10000)")
+    parser.add_argument("--depth", type=int, default=8, choices=range(1, 9), help="Hierarchy depth, at most 8 levels (default: 8)")
+    parser.add_argument("--multi-parent", type=float, default=0.05, help="Share of classes with a second parent (default: 0.05)")
+    parser.add_argument("--relations", type=int, default=1000, help="Number of relation rows (default: 1000)")
+    parser.add_argument("--import-classes", type=int, help="Classes in the import ontology (default: same as --classes)")
+    parser.add_argument("--tasks", type=int, default=3, help="Number of merge tasks (default: 3)")
+    parser.add_argument("--sheet-format", choices=SHEET_FORMATS, default="auto",
+                        help="auto: xlsx while the class sheet fits one worksheet, else TXT (default: auto)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    generate_inputs(args.output_dir, args.classes, args.depth, args.multi_parent, args.relations,
+                    args.import_classes, args.tasks, args.seed, args.sheet_format)
@@ -0,0 +1,181 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.generate_inputs import generate_inputs, BASE_URI, SHEET_FORMATS
+from owl_common.reasoning import REASONING_MODES
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = "10000"
+STAGES = ("excel2owl_classes", "excel2owl_properties", "owl2excel_classes", "owl2excel_properties", "selective_owl_merging",
+          "owl_pipeline")
+# A stage regresses when it is slower / bigger than the baseline by more than
+# the relative threshold *and* these absolute margins (small runs are noisy)
+MIN_SECONDS = 0.5
+MIN_RSS_MB = 20
+
+
+def stage_commands(paths, work_dir, reasoning):
+    # (stage name, argv) for every script, in pipeline order
+    base_owl = os.path.join(work_dir, "base.owl")
+    relations_owl = os.path.join(work_dir, "base_relations.owl")
+    merge_dir = os.path.join(work_dir, "merge")
+    os.makedirs(merge_dir, exist_ok=True)
+    # The same class sheet -> relations -> merge chain in one process
+    pipeline_config = os.path.join(work_dir, "pipeline.json")
+    with open(pipeline_config, "w", encoding="utf-8") as f:
+        json.dump({"ontology_uri": BASE_URI, "class_sheet": paths["classes"], "relation_sheet": paths["relations"],
+                   "merge": {"import_ontology": paths["import"], "tasks": paths["tasks"], "reasoning": reasoning},
+                   "output": os.path.join(work_dir, "pipeline.owl")}, f, indent=2)
+    return [
+        ("excel2owl_classes", ["excel2owl/excel2owl_class_annotations.py", "-e", paths["classes"], "-u", BASE_URI, "-o", base_owl]),
+        ("excel2owl_properties", ["excel2owl/excel2owl_properties.py", "-e", paths["relations"], "-i", base_owl, "-o", relations_owl]),
+        ("owl2excel_classes", ["owl2excel/owl2excel_classes_annotations.py", "-i", relations_owl,
+                               "-o", os.path.join(work_dir, "classes_export.xlsx")]),
+        ("owl2excel_properties", ["owl2excel/owl2excel_properties.py", "-i", relations_owl,
+                                  "-o", os.path.join(work_dir, "properties_export.xlsx")]),
+        ("selective_owl_merging", ["selective_owl_merging/selective_owl_merging.py", "--base", relations_owl,
+                                   "--import_onto", paths["import"], "--tasks", paths["tasks"], "--base_iri", BASE_URI,
+                                   "--output_dir", merge_dir, "--final_output", "merged.owl", "--reasoning", reasoning]),
+        ("owl_pipeline", ["pipeline/owl_pipeline.py", "-c", pipeline_config]),
+    ]
+
+
+def run_stage(argv, log_path):
+    """Run one script in a fresh interpreter; returns wall/CPU seconds and peak RSS.
+
+    os.wait4 reports the resource usage of exactly this child, so stages do
+    not see each other's peak memory.  The script's own per-phase metrics
+    (--metrics) are included under "phases".
+    """
+    metrics_path = os.path.splitext(log_path)[0] + ".metrics.json"
+    if os.path.exists(metrics_path):
+        os.remove(metrics_path)
+    with open(log_path, "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable] + argv + ["--metrics", metrics_path], cwd=REPO,
+                                   stdout=log, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    phases = {}
+    if os.path.exists(metrics_path):
+        with open(metrics_path, encoding="utf-8") as f:
+            phases = json.load(f)["phases"]
+    return {
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+        "max_rss_mb": round(usage.ru_maxrss / 1024, 1),  # ru_maxrss is in KiB on Linux
+        "exit_code": process.returncode,
+        "phases": phases,
+    }
+
+
+def run_size(size, args):
+    work_dir = os.path.join(os.path.abspath(args.work_dir), f"n{size}")
+    start = time.perf_counter()
+    paths = generate_inputs(os.path.join(work_dir, "inputs"), size, args.depth, args.multi_parent,
+                            args.relations, args.import_classes, args.tasks, args.seed, args.sheet_format)
+    results = {"generate_seconds": round(time.perf_counter() - start, 3), "stages": {}}
+
+    for stage, argv in stage_commands(paths, work_dir, args.reasoning):
+        if args.stages and stage not in args.stages:
+            continue
+        runs = [run_stage(argv, os.path.join(work_dir, f"{stage}.log")) for _ in range(args.repeat)]
+        # Best of the repeats for time, worst for memory
+        result = min(runs, key=lambda r: r["wall_seconds"])
+        result["max_rss_mb"] = max(r["max_rss_mb"] for r in runs)
+        result["exit_code"] = max(runs, key=lambda r: abs(r["exit_code"]))["exit_code"]
+        results["stages"][stage] = result
+        status = "ok" if result["exit_code"] == 0 else f"FAILED (exit {result['exit_code']}, see {stage}.log)"
+        print(f"  {stage:<22} {result['wall_seconds']:>9.2f}s wall {result['cpu_seconds']:>9.2f}s cpu "
+              f"{result['max_rss_mb']:>9.1f} MB  {status}")
+        if result["exit_code"] != 0:
+            break  # later stages read this stage's output
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    # [(size, stage, metric, baseline value, current value)]
+    regressions = []
+    for size, current in results["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        for stage, result in current["stages"].items():
+            before = previous["stages"].get(stage)
+            if not before:
+                continue
+            if result["exit_code"] != 0 and before["exit_code"] == 0:
+                regressions.append((size, stage, "exit_code", before["exit_code"], result["exit_code"]))
+            for metric, margin in (("wall_seconds", MIN_SECONDS), ("max_rss_mb", MIN_RSS_MB)):
+                if result[metric] > before[metric] * (1 + threshold) + margin:
+                    regressions.append((size, stage, metric, before[metric], result[metric]))
+    return regressions
+
+
+def environment():
+    import owlready2
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "owlready2": owlready2.VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile every script on synthetic inputs of several sizes.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated class counts, e.g. 10000,100000,1000000 (default: 10000)")
+    parser.add_argument("--depth", type=int, default=8, choices=range(1, 9), help="Hierarchy depth (default: 8)")
+    parser.add_argument("--multi-parent", type=float, default=0.05, help="Share of classes with a second parent (default: 0.05)")
+    parser.add_argument("--relations", type=int, default=1000, help="Relation rows per size (default: 1000)")
+    parser.add_argument("--import-classes", type=int, help="Classes in the import ontology (default: same as the size)")
+    parser.add_argument("--tasks", type=int, default=3, help="Merge tasks (default: 3)")
+    parser.add_argument("--reasoning", choices=REASONING_MODES, default="none", help="Reasoning mode for the merge stage (default: none, runs without Java)")
+    parser.add_argument("--sheet-format", choices=SHEET_FORMATS, default="auto", help="Format of the generated sheets (default: auto)")
+    parser.add_argument("--stages", nargs="+", choices=STAGES,
+                        help="Only run these stages; the outputs of skipped earlier stages must already be in --work-dir")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per stage; the fastest is kept (default: 1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--work-dir", default="benchmark_work", help="Directory for generated inputs, outputs and logs")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Where to write the results JSON")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Also write the results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slowdown / memory growth flagged as a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    results = {"environment": environment(), "settings": vars(args), "sizes": {}}
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Benchmark with {size} classes:")
+        results["sizes"][str(size)] = run_size(size, args)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to: {args.output}")
+
+    exit_code = 0
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for size, stage, metric, before, after in regressions:
+            print(f"REGRESSION n={size} {stage}: {metric} {before} -> {after}")
+        if regressions:
+            exit_code = 1
+        else:
+            print(f"No regressions against: {args.baseline}")
+    elif args.baseline and args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to: {args.baseline}")
+    if any(r["exit_code"] for size in results["sizes"].values() for r in size["stages"].values()):
+        exit_code = 1
+    sys.exit(exit_code)
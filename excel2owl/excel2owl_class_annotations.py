@@ -1,17 +1,13 @@
-import pandas as pd
-from owlready2 import *
-from rdflib.namespace import RDFS, SKOS
+import os
+import sys
+import json
+import types
 import argparse
 
-def clean_excel_to_utf8_txt(input_file: str, output_file: str):
-    import pandas as pd
-
-    df = pd.read_excel(input_file)
-    df_cleaned = df.replace({r'[\r\n]+': ' '}, regex=True)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import phase, timed, preload, add_instrumentation_arguments, configure_from_args
 
-    # Save as UTF-8 tab-separated file
-    df_cleaned.to_csv(output_file, sep="\t", index=False, encoding="utf-8")
-    print(f"Saved cleaned UTF-8 TXT to: {output_file}")
+ENGINES = ("owlready2", "rdf")
 
 def formalize_label(label):
     exceptions = {"a", "an", "the", "and", "but", "or", "for", "nor", "on", "at", "to", "from", "by", "of", "in", "with"}
@@ -27,22 +23,215 @@ def formalize_label(label):
 
     return "_".join(result)
 
-def build_ontology_with_standard_annotations(txt_path: str, ontology_uri: str, output_path: str):
-    # Step 1: Load the tab-separated .txt file
-    df = pd.read_csv(txt_path, sep="\t", dtype=str).fillna("")
-
-    # Step 2: Create the main ontology
-    onto = get_ontology(ontology_uri)
-
-    # Load SKOS ontology outside the with block
-    skos = get_ontology("http://www.w3.org/2004/02/skos/core").load()
-
-    # === ID generation setup ===
-    id_counter = 0
-    label_to_id = {}  # Maps label text to 000001-style IDs
+LEVELS = range(1, 9)
+
+# Per-level annotation columns ("level_N <column>") -> annotation attribute on the class
+ANNOTATION_COLUMNS = [
+    ("comment", "comment"),
+    ("definition", "definition"),
+    ("synonym", "altLabel"),
+    ("ICD10CM", "ICD10CM"),
+    ("UMLS_CUI", "UMLS_CUI"),
+    ("UMLS_Semantic_Types", "UMLS_Semantic_Types"),
+]
+MULTI_VALUE_COLUMNS = {"comment", "definition", "synonym"}  # '|'-separated lists
+
+
+def parse_annotation_cells(get_cell):
+    # get_cell(column) -> raw cell text; returns {attribute: [values]} for non-empty annotations
+    annotations = {}
+    for column, attr in ANNOTATION_COLUMNS:
+        text = get_cell(column)
+        if column in MULTI_VALUE_COLUMNS:
+            values = [item.strip().replace("\\n", "\n") for item in text.split('|') if item.strip()]
+        else:
+            values = [text.strip()] if text.strip() else []
+        if values:
+            annotations[attr] = values
+    return annotations
+
+
+class HierarchyTables:
+    """Deduplicated class hierarchy extracted from the level_N sheet layout.
+
+    labels:      class_id -> formalized label, in first-appearance (row, level) order
+    parents:     class_id -> distinct parent class_ids in first-seen order (None = top level)
+    annotations: class_id -> {attribute: [values]} taken from the class's first row
+    variants:    formalized label -> {raw cell text: first row}, for collision checks
+    edge_rows:   (class_id, parent_id) -> first row stating the edge
+    Rows are 1-based among the non-empty data rows.
+    """
+
+    def __init__(self):
+        self.labels = {}
+        self.label_to_id = {}
+        self.parents = {}
+        self.annotations = {}
+        self.variants = {}
+        self.edge_rows = {}
+        self.row_count = 0
+
+    def edges(self):
+        for class_id, parents in self.parents.items():
+            for parent_id in parents:
+                yield class_id, parent_id
+
+    def digest(self, class_id):
+        # Fingerprint of everything the rows say about one class
+        import hashlib
+
+        record = [
+            self.labels[class_id],
+            sorted(p or "" for p in self.parents[class_id]),
+            sorted(self.annotations[class_id].items()),
+        ]
+        return hashlib.sha1(json.dumps(record, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def extract_hierarchy_tables(rows, chunksize=50000, tables=None, registry=None):
+    # Column-wise pre-pass: Python work scales with distinct labels/edges, not rows x levels.
+    # With a LabelRegistry, IDs come from the persistent label -> ID mapping.
+    import numpy as np
+    import pandas as pd
+    from owl_common.sheet_reader import iter_row_chunks
+
+    tables = tables or HierarchyTables()
+    formalized = {}  # raw cell text -> formalized label
+    level_columns = [f"level_{level}" for level in LEVELS]
+    width = len(level_columns)
+
+    for chunk in iter_row_chunks(rows, chunksize):
+        first_row = tables.row_count + 1
+        tables.row_count += len(chunk)
+
+        # 1. Formalize each level column once over its unique values
+        labels = pd.DataFrame(index=chunk.index)
+        for column in level_columns:
+            if column not in chunk:
+                labels[column] = ""
+                continue
+            values = chunk[column].astype(str)
+            firsts = np.flatnonzero(~values.duplicated().to_numpy())
+            for raw, row in zip(values.to_numpy()[firsts], firsts + first_row):
+                if raw not in formalized:
+                    formalized[raw] = formalize_label(raw)
+                    if formalized[raw]:
+                        tables.variants.setdefault(formalized[raw], {})[raw] = int(row)
+            labels[column] = values.map(formalized)
+
+        # 2. Assign IDs in row-major (row, level) first-appearance order
+        cells = labels.to_numpy(dtype=object).ravel()
+        present = cells != ""
+        positions = pd.Series(np.flatnonzero(present), index=cells[present])
+        first_positions = positions[~positions.index.duplicated()]
+        new_labels = []
+        for label, position in first_positions.items():
+            if label not in tables.label_to_id:
+                class_id = registry.class_id(label) if registry else f"{len(tables.label_to_id):05d}"
+                tables.label_to_id[label] = class_id
+                tables.labels[class_id] = label
+                tables.parents[class_id] = []
+                new_labels.append((class_id, position))
+
+        # 3. Parent of each cell = nearest non-empty level to its left in the same row
+        matrix = labels.to_numpy(dtype=object)
+        parents = np.empty_like(matrix)
+        last = np.full(len(matrix), None, dtype=object)
+        for level in range(width):
+            parents[:, level] = last
+            last = np.where(matrix[:, level] != "", matrix[:, level], last)
+        edge_frame = pd.DataFrame({
+            "child": cells[present],
+            "parent": parents.ravel()[present],
+            "row": np.flatnonzero(present) // width + first_row,
+        }).drop_duplicates(["child", "parent"])
+        for child, parent, row in edge_frame.itertuples(index=False):
+            class_id = tables.label_to_id[child]
+            parent_id = None if pd.isna(parent) else tables.label_to_id[parent]
+            if parent_id not in tables.parents[class_id]:
+                tables.parents[class_id].append(parent_id)
+                tables.edge_rows[(class_id, parent_id)] = int(row)
+
+        # 4. One annotation record per new class, from the row where it first appears
+        for class_id, position in new_labels:
+            row, level = divmod(int(position), width)
+            level_num = level + 1
+            record = chunk.iloc[row]
+            tables.annotations[class_id] = parse_annotation_cells(
+                lambda column: str(record.get(f"level_{level_num} {column}", ""))
+            )
+
+    return tables
+
+
+def topological_class_order(tables):
+    # Kahn's algorithm over the (child, parent) edges; ties broken by ID so that
+    # sheets without back references keep plain ID order
+    import heapq
+
+    pending = {}
+    children = {}
+    for class_id, parent_id in tables.edges():
+        if parent_id is None:
+            continue
+        pending[class_id] = pending.get(class_id, 0) + 1
+        children.setdefault(parent_id, []).append(class_id)
+
+    ready = [int(class_id) for class_id in tables.labels if class_id not in pending]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        class_id = f"{heapq.heappop(ready):05d}"
+        order.append(class_id)
+        for child in children.get(class_id, []):
+            pending[child] -= 1
+            if pending[child] == 0:
+                heapq.heappush(ready, int(child))
+
+    if len(order) != len(tables.labels):
+        cyclic = sorted(set(tables.labels) - set(order))
+        raise ValueError(f"Cyclic parent chain among classes: {[tables.labels[c] for c in cyclic]}")
+    return order
+
+
+def write_ontology_triples(tables, ontology_uri: str, output_path: str, fmt="rdfxml"):
+    # Native engine: stream the tables straight to RDF with the same IRIs and
+    # annotations the owlready2 path produces, without creating Python classes
+    from owl_common.triple_writer import TripleWriter, ontology_base_iri, RDFS as RDFS_NS, OWL, SKOS as SKOS_NS
+    from owl_common.ontology_writer import open_output
+
+    base_iri = ontology_base_iri(ontology_uri)
+    local_properties = ["ICD10CM", "UMLS_CUI", "UMLS_Semantic_Types"]
+    property_iris = {
+        "comment": RDFS_NS + "comment",
+        "definition": SKOS_NS + "definition",
+        "altLabel": SKOS_NS + "altLabel",
+    }
+    property_iris.update({name: base_iri + name for name in local_properties})
+
+    with open_output(output_path, text=True) as f:
+        writer = TripleWriter(f, fmt, base_iri, prefixes={"skos": SKOS_NS})
+        writer.begin()
+        writer.write(base_iri[:-1], OWL + "Ontology")
+        for name in local_properties:
+            writer.write(base_iri + name, OWL + "AnnotationProperty")
+
+        for class_id, label in tables.labels.items():
+            statements = [(RDFS_NS + "subClassOf", base_iri + p, True) for p in tables.parents[class_id] if p is not None]
+            statements.append((RDFS_NS + "label", label, False))
+            for attr, values in tables.annotations[class_id].items():
+                statements.extend((property_iris[attr], value, False) for value in values)
+            writer.write(base_iri + class_id, OWL + "Class", statements)
+        writer.end()
+
+    print(f"Ontology saved to: {output_path} ({writer.count} subjects, {fmt})")
+
+
+def declare_annotation_properties(onto, skos):
+    from owlready2 import AnnotationProperty
 
     with onto:
-        # Step 3: Define skos:definition annotation property in SKOS namespace
+        # Define skos:definition annotation property in SKOS namespace
         class definition(AnnotationProperty):
             namespace = skos
         
@@ -55,112 +244,202 @@ def build_ontology_with_standard_annotations(txt_path: str, ontology_uri: str, o
         class UMLS_Semantic_Types(AnnotationProperty):
             namespace = onto
 
-        created_classes = {}     # key: class_id -> value: owlready2 class object
-        class_parents_map = {}   # key: class_id -> set of parent classes
-
-        # Step 4: Iterate through each row
-        for _, row in df.iterrows():
-            hierarchy = []
-
-            # Build hierarchy: list of (class_id, label, level_num)
-            for level in range(1, 9):
-                label = row.get(f"level_{level}", "").strip()
-                label = formalize_label(label)
-                if label:
-                    if label not in label_to_id:
-                        label_to_id[label] = f"{id_counter:05d}"
-                        id_counter += 1
-                    iri_suffix = label_to_id[label]
-                    hierarchy.append((iri_suffix, label, level))
-          
-            print(f"hierarchy:", hierarchy)
-
-            # Step 5: Build or update class hierarchy with multiple parent support
-            parent = Thing
-            for class_id, label, level_num in hierarchy:
-                if class_id not in created_classes:
-                    # First time seen: create class
-                    new_class = types.new_class(class_id, (parent,))
-                    created_classes[class_id] = new_class
-                    class_parents_map[class_id] = {parent}
-
-                    # Annotations
-                    # rdfs:label
-                    new_class.label.append(label)
-
-                    # rdfs:comment
-                    comment_text = row.get(f"level_{level_num} comment", "")
-                    new_class.comment.extend(
-                        item.strip().replace("\\n", "\n") for item in comment_text.split('|') if item.strip()
-                    )
-
-                    # skos:definition
-                    definition_text = row.get(f"level_{level_num} definition", "")
-                    new_class.definition.extend(
-                        item.strip().replace("\\n", "\n") for item in definition_text.split('|') if item.strip()
-                    )
-
-                    # skos:altLabel
-                    synonym_text = row.get(f"level_{level_num} synonym", "")
-                    new_class.altLabel.extend(
-                        item.strip().replace("\\n", "\n") for item in synonym_text.split('|') if item.strip()
-                    )
-
-                    # ICD10CM 
-                    ICD10CM_text = row.get(f"level_{level_num} ICD10CM", "")
-                    if ICD10CM_text.strip():
-                        new_class.ICD10CM.append(ICD10CM_text.strip()) 
-                    
-                    # UMLS_CUI
-                    UMLS_CUI_text = row.get(f"level_{level_num} UMLS_CUI", "")
-                    if UMLS_CUI_text.strip():
-                        new_class.UMLS_CUI.append(UMLS_CUI_text.strip()) 
-
-                    #UMLS_Semantic_Types
-                    UMLS_Semantic_Types_text = row.get(f"level_{level_num} UMLS_Semantic_Types", "")
-                    if UMLS_Semantic_Types_text.strip():
-                        new_class.UMLS_Semantic_Types.append(UMLS_Semantic_Types_text.strip()) 
-
-
-                else:
-                    # Already exists, check if new parent needs to be added
-                    existing_class = created_classes[class_id]
-                    if parent not in class_parents_map[class_id]:
-                        # Add new parent (multi-inheritance)
-                        new_parents = set(existing_class.is_a) | {parent}
-                        existing_class.is_a = list(new_parents)
-                        class_parents_map[class_id].add(parent)
-
-                # Move down to next level
-                parent = created_classes[class_id]
-                
-                
-    for cls in onto.classes():
-        cls.is_a = [parent for parent in cls.is_a if parent != owl.Thing]
-
-    # Step 6: Save the ontology
-    onto.save(file=output_path, format="rdfxml")
-    print(f"Ontology saved to: {output_path}")
+
+def create_classes(onto, tables, class_ids=None, existing=None):
+    # Create (or, for classes in `existing`, patch) classes with their final parents.
+    # class_ids restricts the work to a subset; other parents are looked up in `existing`.
+    from owlready2 import Thing
+
+    existing = existing or {}
+    created_classes = dict(existing)     # key: class_id -> value: owlready2 class object
+    selected = set(tables.labels if class_ids is None else class_ids)
+
+    with onto:
+        for class_id in topological_class_order(tables):
+            if class_id not in selected:
+                continue
+            parent_ids = [p for p in tables.parents[class_id] if p is not None]
+            parents = tuple(created_classes[p] for p in parent_ids) or (Thing,)
+
+            if class_id in existing:
+                cls = existing[class_id]
+                cls.is_a = list(parent for parent in parents if parent is not Thing)
+                cls.label = []
+                for _, attr in ANNOTATION_COLUMNS:
+                    setattr(cls, attr, [])
+            else:
+                cls = types.new_class(class_id, parents)
+                if not parent_ids:
+                    cls.is_a = []  # top-level class: no explicit owl:Thing parent
+                created_classes[class_id] = cls
+
+            # rdfs:label, then comment/definition/altLabel/ICD10CM/UMLS annotations
+            cls.label.append(tables.labels[class_id])
+            for attr, values in tables.annotations[class_id].items():
+                getattr(cls, attr).extend(values)
+
+    return created_classes
+
+
+def read_class_tables(source, registry=None, validate=True):
+    # Stream rows from the sheet (xlsx/TXT path) or take an iterable of row dicts.
+    # With validate, label collisions and parent cycles raise SheetValidationError
+    # before any ontology work starts.
+    from owl_common.sheet_reader import iter_sheet_rows
+    from owl_common.sheet_validation import validate_class_tables
+
+    rows = timed(iter_sheet_rows(source) if isinstance(source, str) else source, "read")
+    with phase("normalize") as p:
+        tables = extract_hierarchy_tables(rows, registry=registry)
+        p.items = tables.row_count
+    print(f"Extracted {len(tables.labels)} classes from {tables.row_count} rows")
+    if validate:
+        with phase("validate", items=tables.row_count):
+            report = validate_class_tables(tables)
+        if report.issues:
+            print(report.summary())
+        report.raise_for_errors()
+    return tables
+
+
+def build_class_ontology(tables, ontology_uri, world=None):
+    # owlready2 engine: a new, unsaved ontology in `world` (default: owlready2's
+    # default_world) holding every class of the tables
+    from owlready2 import default_world
+    from owl_common.vocabularies import load_skos
+
+    world = world or default_world
+    with phase("build", items=len(tables.labels)):
+        onto = world.get_ontology(ontology_uri)
+
+        # Load the bundled SKOS vocabulary outside the with block
+        skos = load_skos(world)
+        declare_annotation_properties(onto, skos)
+        create_classes(onto, tables)
+    return onto
+
+
+def patch_ontology(tables, ontology_uri, output_path, changed, removed, fmt="rdfxml", world=None, serialize_workers=1):
+    # Incremental build: load the previous output and touch only changed/removed classes
+    from owlready2 import destroy_entity
+    from owl_common.vocabularies import load_skos, register_local_vocabularies
+    from owl_common.triple_writer import ontology_base_iri
+    from owl_common.ontology_cache import load_ontologies
+    from owl_common.ontology_writer import save_ontology
+
+    register_local_vocabularies()
+    onto, = load_ontologies([output_path], world=world)
+    if onto.base_iri != ontology_base_iri(ontology_uri):
+        return False
+    skos = load_skos(onto.world)
+    declare_annotation_properties(onto, skos)
+
+    for class_id in removed:
+        cls = onto[class_id]
+        if cls is not None:
+            destroy_entity(cls)
+
+    needed = set(changed)
+    for class_id in changed:
+        needed.update(p for p in tables.parents[class_id] if p is not None)
+    existing = {class_id: onto[class_id] for class_id in needed if onto[class_id] is not None}
+    create_classes(onto, tables, changed, existing)
+
+    save_ontology(onto, output_path, fmt, serialize_workers)
+    print(f"Ontology patched in place: {output_path} ({len(changed)} changed, {len(removed)} removed)")
+    return True
+
+
+def build_ontology_with_standard_annotations(source, ontology_uri: str, output_path: str, engine="owlready2", fmt="rdfxml",
+                                             registry_path=None, incremental=False, world=None, validate=True, serialize_workers=1):
+    from owl_common.label_registry import LabelRegistry
+    from owl_common.sheet_validation import SheetValidationError
+    from owl_common.ontology_writer import save_ontology
+
+    registry = LabelRegistry(registry_path) if registry_path else None
+    try:
+        tables = read_class_tables(source, registry, validate)
+    except SheetValidationError:
+        if registry:
+            registry.close()
+        raise
+
+    digests = {class_id: tables.digest(class_id) for class_id in tables.labels} if registry else None
+    try:
+        # Step 2: Incremental mode patches the previous output when only some classes changed
+        if incremental and registry and engine == "owlready2" and os.path.exists(output_path):
+            previous = registry.digests()
+            changed = [class_id for class_id, digest in digests.items() if previous.get(class_id) != digest]
+            removed = [class_id for class_id in previous if class_id not in digests]
+            if not changed and not removed:
+                print(f"Ontology is up to date: {output_path}")
+                registry.save(digests)
+                return
+            with phase("build", items=len(changed) + len(removed)):
+                patched = patch_ontology(tables, ontology_uri, output_path, changed, removed, fmt, world, serialize_workers)
+            if patched:
+                registry.save(digests)
+                return
+            print(f"{output_path} was built with a different URI, rebuilding")
+
+        # Step 3: Full build
+        if engine == "rdf":
+            with phase("serialize", items=len(tables.labels)):
+                write_ontology_triples(tables, ontology_uri, output_path, fmt)
+        else:
+            onto = build_class_ontology(tables, ontology_uri, world)
+            with phase("serialize", items=len(tables.labels)):
+                save_ontology(onto, output_path, fmt, serialize_workers)
+            print(f"Ontology saved to: {output_path}")
+
+        if registry:
+            registry.save(digests)
+    finally:
+        if registry:
+            registry.close()
 
 
 
 if __name__ == "__main__":
-    
-    parser = argparse.ArgumentParser(description="Convert Excel to OWL ontology via UTF-8 Txt.")
+    from owl_common.ontology_writer import add_output_arguments
+
+    parser = argparse.ArgumentParser(description="Convert Excel to OWL ontology.")
     parser.add_argument("-e", "--excel", required=True, help="Input Excel file with ontology data")
     parser.add_argument("-u", "--uri", required=True, help="Ontology base URI (e.g., https://yourdomain.org/ontology#)")
     parser.add_argument("-o", "--output", required=True, help="Path to output OWL file")
-    parser.add_argument("-t", "--txt", help="Optional: output intermediate TXT file path")
+    parser.add_argument("-t", "--txt", help="Optional: also write the cleaned rows to this UTF-8 TXT file (debug)")
+    parser.add_argument("--engine", choices=ENGINES, default="owlready2",
+                        help="owlready2 (default) builds Python classes; rdf streams triples directly to the output")
+    add_output_arguments(parser)
+    parser.add_argument("--registry", help="Optional: SQLite label->ID registry reused across runs so IRIs stay stable")
+    parser.add_argument("--incremental", action="store_true",
+                        help="With --registry: patch the existing output, touching only classes whose rows changed")
+    parser.add_argument("--no-validate", action="store_true", help="Skip the pre-flight check for label collisions and parent cycles")
+    parser.add_argument("--validation-report", help="Optional: write the pre-flight check's problems to this JSON file")
+    add_instrumentation_arguments(parser)
 
     args = parser.parse_args()
-
-    # Step 1: Excel -> TXT
-    if args.txt:
-        txt_path = args.txt
-    else:
-        txt_path = args.excel.replace(".xlsx", "_utf8.txt")
-
-    clean_excel_to_utf8_txt(args.excel, txt_path)
-
-    # Step 2: TXT -> OWL
-    build_ontology_with_standard_annotations(txt_path, args.uri, args.output)
+    if args.incremental and not args.registry:
+        parser.error("--incremental requires --registry")
+    if args.incremental and args.format == "turtle":
+        parser.error("--incremental reloads the output, which owlready2 cannot read as turtle")
+
+    from owl_common.sheet_reader import iter_sheet_rows, sheet_libraries
+    from owl_common.sheet_validation import SheetValidationError
+
+    instrumentation = configure_from_args("excel2owl_class_annotations", args)
+    preload(*sheet_libraries(args.excel), "numpy", "pandas", *(("owlready2",) if args.engine == "owlready2" else ()))
+
+    # Stream Excel rows straight into the ontology build (TXT only written on request)
+    rows = iter_sheet_rows(args.excel, debug_txt=args.txt)
+    try:
+        build_ontology_with_standard_annotations(rows, args.uri, args.output, engine=args.engine, fmt=args.format,
+                                                 registry_path=args.registry, incremental=args.incremental,
+                                                 validate=not args.no_validate, serialize_workers=args.serialize_workers)
+    except SheetValidationError as e:
+        if args.validation_report:
+            e.report.save(args.validation_report)
+            print(f"Saved validation report to: {args.validation_report}")
+        instrumentation.close()
+        sys.exit(f"Aborted: {args.excel} failed validation")
+    instrumentation.close()
@@ -1,118 +1,208 @@
-import pandas as pd
+import os
+import sys
 import types
-import re
-from tqdm import tqdm
-from owlready2 import get_ontology, ObjectProperty, DataProperty, Thing
 import argparse
 
-def clean_excel_to_utf8_txt(input_file: str, output_file: str):
-    import pandas as pd
-
-    df = pd.read_excel(input_file)
-    df_cleaned = df.replace({r'[\r\n]+': ' '}, regex=True)
-
-    # Save as UTF-8 tab-separated file
-    df_cleaned.to_csv(output_file, sep="\t", index=False, encoding="utf-8")
-    print(f"Saved cleaned UTF-8 TXT to: {output_file}")
-
-def get_next_property_index(onto, prefix):
-    max_index = 0
-    all_props = list(onto.object_properties()) + list(onto.data_properties())
-    for prop in all_props:
-        match = re.match(rf"{prefix}(\d+)", prop.name)
-        if match:
-            idx = int(match.group(1))
-            max_index = max(max_index, idx)
-    return max_index + 1
-
-def property_exists_by_label(prop_list, label_text):
-    for prop in prop_list:
-        if label_text in prop.label:
-            return prop
-    return None
-
-def get_or_create_property_by_label(onto, label_text, prop_type, next_index):
-    prop_list = onto.object_properties() if prop_type == "object" else onto.data_properties()
-    existing = property_exists_by_label(prop_list, label_text)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import phase, timed, log, preload, add_instrumentation_arguments, configure_from_args
+
+DEFAULT_BASE_IRI = "https://github.com/Tao-AI-group/BSO_AD#"
+
+def normalize_column(name):
+    return name.strip().lower().replace(" ", "_")
+
+def build_label_index(onto):
+    # One pass over the ontology: normalized label -> [entities] for classes and properties
+    from owl_common.sheet_validation import normalize_label
+
+    index = {"class": {}, "object": {}, "data": {}}
+    sources = [
+        ("class", onto.world.classes()),
+        ("object", onto.object_properties()),
+        ("data", onto.data_properties()),
+    ]
+    for kind, entities in sources:
+        table = index[kind]
+        for entity in entities:
+            for label in entity.label:
+                matches = table.setdefault(normalize_label(label), [])
+                if entity not in matches:
+                    matches.append(entity)
+    return index
+
+def report_ambiguous_labels(index):
+    ambiguous = {}
+    for kind, table in index.items():
+        for key, entities in table.items():
+            if len(entities) > 1:
+                ambiguous[(kind, key)] = entities
+    for (kind, key), entities in ambiguous.items():
+        print(f"ambiguous {kind} label '{key}': {[e.iri for e in entities]} (using {entities[0].iri})")
+    return ambiguous
+
+def get_or_create_property_by_label(index, label_text, prop_type, allocator):
+    from owl_common.sheet_validation import normalize_label
+
+    table = index[prop_type]
+    existing = table.get(normalize_label(label_text))
     if existing:
-        print(f"exist {prop_type} property label='{label_text}' -> IRI: {existing.iri}")
-        return existing, next_index
+        log(f"exist {prop_type} property label='{label_text}' -> IRI: {existing[0].iri}")
+        return existing[0]
 
     prefix = "R" if prop_type == "object" else "D"
-    iri_name = f"{prefix}{next_index:03d}"
+    iri_name = f"{prefix}{allocator.next_id(prefix, first=1):03d}"
     
 
+    from owlready2 import ObjectProperty, DataProperty
+
     base_class = ObjectProperty if prop_type == "object" else DataProperty
     prop = types.new_class(iri_name, (base_class,))
     prop.label = [label_text]
+    table[normalize_label(label_text)] = [prop]
     
-    print(f"creat new {prop_type} property: {prop.iri}")
-    return prop, next_index + 1
+    log(f"creat new {prop_type} property: {prop.iri}")
+    return prop
+
+def get_class_by_label(index, label):
+    from owl_common.sheet_validation import normalize_label
 
-def get_class_by_label(onto, label):
-    results = list(onto.search(label=label))
+    key = normalize_label(label)
+    results = index["class"].get(key)
     if results:
         entity = results[0]
-        if isinstance(entity, type) and issubclass(entity, Thing):
-            print(f"existed label='{label}' -> class: {entity.name}")
-            return entity
-        else:
-            raise TypeError(f"label='{label}' this is not class but: {type(entity)}")
+        log(f"existed label='{label}' -> class: {entity.name}")
+        return entity
+    for kind in ("object", "data"):
+        if key in index[kind]:
+            raise TypeError(f"label='{label}' this is not class but: {type(index[kind][key][0])}")
+    print(f"no class with label='{label}'")
     
 
-def add_properties_from_txt(owl_path, txt_path, output_path):
-    df = pd.read_csv(txt_path, sep="\t", dtype=str)
-    df.columns = df.columns.str.strip().str.lower().str.replace(" ", "_")
+def property_allocator(onto, owl_path=None, cache_dir=None):
+    # Property numbers continue from the ontology's high-water marks; with the
+    # file it was loaded from they are kept in an index (in cache_dir if
+    # given), so unchanged files are not rescanned
+    from owl_common.iri_allocator import IRIAllocator, ontology_scans
+
+    return IRIAllocator(owl_path, onto.base_iri, ontology_scans(onto, onto.base_iri, ("R", "D")), cache_dir)
+
+def read_relation_rows(source):
+    # Rows of the relation sheet (xlsx/TXT path or iterable of row dicts) with
+    # normalized column names; a list is taken as already read
+    from owl_common.sheet_reader import iter_sheet_rows
+
+    if isinstance(source, list):
+        rows = source
+    else:
+        rows = timed(iter_sheet_rows(source) if isinstance(source, str) else source, "read")
+    return [{normalize_column(k): v for k, v in row.items()} for row in rows]
+
+def validate_relations(rows, label_index):
+    # Pre-flight check of every row against the ontology's labels; raises SheetValidationError
+    from owl_common.sheet_validation import validate_relation_rows
+
+    with phase("validate", items=len(rows)):
+        report = validate_relation_rows(rows, label_index["class"], label_index["object"], label_index["data"])
+    if report.issues:
+        print(report.summary())
+    report.raise_for_errors()
+
+def add_properties(onto, source, allocator, validate=True):
+    # Add the relations of source (path to the relation sheet (xlsx/TXT) or an
+    # iterable of row dicts) to the in-memory onto; nothing is saved.  With
+    # validate, every row is checked before the first property is created.
+    from tqdm import tqdm
+
+    rows = read_relation_rows(source)
 
-    onto = get_ontology(owl_path).load()
-    onto.base_iri = "https://github.com/Tao-AI-group/BSO_AD#"
-        
     with onto:
-        next_obj_index = get_next_property_index(onto, "R")
-        next_data_index = get_next_property_index(onto, "D")
+        next_obj_index = max(allocator.high_water("R") + 1, 1)
+        next_data_index = max(allocator.high_water("D") + 1, 1)
         print(f"object property starting index R{next_obj_index:03d}, data property starting index D{next_data_index:03d}")
 
-        for _, row in tqdm(df.iterrows(), total=len(df), desc="Adding properties"):
-            prop_label = row['name'].strip()
-            prop_type = row['property'].strip().lower()
-            domain_label = row['domain'].strip()
-            range_label = row['range'].strip()
-
-            DomainClass = get_class_by_label(onto, domain_label)
-
-            if prop_type == "object property":
-                RangeClass = get_class_by_label(onto, range_label)
-                prop, next_obj_index = get_or_create_property_by_label(onto, prop_label, "object", next_obj_index)
-                prop.domain = [DomainClass]
-                prop.range = [RangeClass]
-            elif prop_type == "data property":
-                prop, next_data_index = get_or_create_property_by_label(onto, prop_label, "data", next_data_index)
-                prop.domain = [DomainClass]
-                
-                
-            else:
-                print(f"unknow type: {prop_type} skip")
-
-    onto.save(file=output_path, format="rdfxml")
+        with phase("normalize") as p:
+            label_index = build_label_index(onto)
+            p.items = sum(len(table) for table in label_index.values())
+        report_ambiguous_labels(label_index)
+        if validate:
+            validate_relations(rows, label_index)
+
+        with phase("build", items=0) as p:
+            for row in tqdm(rows, desc="Adding properties"):
+                p.items += 1
+                prop_label = row['name'].strip()
+                prop_type = row['property'].strip().lower()
+                domain_label = row['domain'].strip()
+                range_label = row['range'].strip()
+
+                DomainClass = get_class_by_label(label_index, domain_label)
+
+                if prop_type == "object property":
+                    RangeClass = get_class_by_label(label_index, range_label)
+                    prop = get_or_create_property_by_label(label_index, prop_label, "object", allocator)
+                    prop.domain = [DomainClass]
+                    prop.range = [RangeClass]
+                elif prop_type == "data property":
+                    prop = get_or_create_property_by_label(label_index, prop_label, "data", allocator)
+                    prop.domain = [DomainClass]
+                    
+                    
+                else:
+                    print(f"unknow type: {prop_type} skip")
+
+def add_properties_from_txt(owl_path, source, output_path, cache_dir=None, base_iri=DEFAULT_BASE_IRI, validate=True,
+                            fmt="rdfxml", serialize_workers=1):
+    from owl_common.ontology_cache import load_ontologies
+    from owl_common.vocabularies import register_local_vocabularies
+    from owl_common.ontology_writer import save_ontology
+
+    rows = read_relation_rows(source)
+    register_local_vocabularies()
+    with phase("read"):
+        onto, = load_ontologies([owl_path], cache_dir)
+    if base_iri:
+        onto.base_iri = base_iri
+
+    allocator = property_allocator(onto, owl_path, cache_dir)
+    add_properties(onto, rows, allocator, validate)
+
+    with phase("serialize"):
+        save_ontology(onto, output_path, fmt, serialize_workers)
+    allocator.record(output_path)
+    allocator.close()
     print(f"\n ontology is saved into : {output_path}")
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Convert Excel relations to OWL via TXT, and save to new OWL file.")
+    from owl_common.ontology_writer import add_output_arguments
+
+    parser = argparse.ArgumentParser(description="Add Excel relations to OWL, and save to new OWL file.")
     parser.add_argument("-e", "--excel", required=True, help="Path to input Excel file with relations")
     parser.add_argument("-i", "--input", required=True, help="Path to input OWL file")
     parser.add_argument("-o", "--output", required=True, help="Path to output OWL file")
-    parser.add_argument("-t", "--txt", help="Optional: path to intermediate TXT file (default will be based on Excel name)")
+    parser.add_argument("-t", "--txt", help="Optional: also write the cleaned rows to this UTF-8 TXT file (debug)")
+    parser.add_argument("--cache-dir", help="Optional: reuse parsed ontologies cached in this directory and keep IRI indexes there instead of next to the files (keyed by file content)")
+    parser.add_argument("--base-iri", default=DEFAULT_BASE_IRI, help=f"Namespace of the new properties (default: {DEFAULT_BASE_IRI})")
+    parser.add_argument("--no-validate", action="store_true", help="Skip the pre-flight check of property types, domains and ranges")
+    parser.add_argument("--validation-report", help="Optional: write the pre-flight check's problems to this JSON file")
+    add_output_arguments(parser)
+    add_instrumentation_arguments(parser)
 
     args = parser.parse_args()
-
-    # 1. Step: Excel -> UTF-8 TXT
-    if args.txt:
-        txt_path = args.txt
-    else:
-        txt_path = args.excel.replace(".xlsx", "_utf8.txt")
-
-    clean_excel_to_utf8_txt(args.excel, txt_path)
-
-    # 2. Step: Add properties to OWL
-    add_properties_from_txt(args.input, txt_path, args.output)
-
+    from owl_common.sheet_reader import iter_sheet_rows, sheet_libraries
+    from owl_common.sheet_validation import SheetValidationError
+
+    instrumentation = configure_from_args("excel2owl_properties", args)
+    preload(*sheet_libraries(args.excel), "owlready2", "tqdm", *(() if args.no_validate else ("pandas",)))
+
+    # Stream Excel rows straight into the property step (TXT only written on request)
+    rows = iter_sheet_rows(args.excel, debug_txt=args.txt)
+    try:
+        add_properties_from_txt(args.input, rows, args.output, cache_dir=args.cache_dir, base_iri=args.base_iri,
+                                validate=not args.no_validate, fmt=args.format, serialize_workers=args.serialize_workers)
+    except SheetValidationError as e:
+        if args.validation_report:
+            e.report.save(args.validation_report)
+            print(f"Saved validation report to: {args.validation_report}")
+        instrumentation.close()
+        sys.exit(f"Aborted: {args.excel} failed validation")
+    instrumentation.close()
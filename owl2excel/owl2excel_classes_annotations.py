@@ -1,42 +1,115 @@
-from owlready2 import get_ontology, Thing, rdfs, AnnotationProperty
-import csv
-import math
-import pandas as pd
+import os
+import sys
 import argparse
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import phase, preload, add_instrumentation_arguments, configure_from_args
+
 # obtain label or name
 def get_label_or_name(cls):
     return cls.label.first() if cls.label else cls.name
 
+#bulk-fetch annotations: one quadstore query for all classes and properties
+def fetch_annotation_table(world, props):
+    # Returns one column per property: {subject storid: first value}. quads
+    # lists object values before literals, in insertion order, exactly like
+    # the per-class getattr lookups did.
+    storids = [prop.storid for prop in props]
+    columns = {storid: {} for storid in storids}
+    placeholders = ",".join("?" * len(storids))
+    rows = world.graph.execute(f"SELECT s, p, o, d FROM quads WHERE p IN ({placeholders})", storids)
+    for s, p, o, d in rows:
+        column = columns[p]
+        if s not in column:
+            column[s] = world._to_python(o, d)
+    return [columns[storid] for storid in storids]
+
 #extract annotation
-def get_annotation_summary(cls, props):
-    values = []
-    for prop in props:
-        if isinstance(prop, str):
-            # support skos__definition, UMLS_cui etc
-            val_list = getattr(cls, prop, [])
-        else:
-            val_list = getattr(cls, prop.python_name, [])
-        
-        values.append(val_list[0] if val_list else "")
-    return values  # to ensure every annotation property in one column and align with the header order 
-
-# traverse 
-def traverse_class(cls, path, all_paths, props, depth=1):
-    subclasses = list(cls.subclasses())
-    label = get_label_or_name(cls)
-    annotation_values = get_annotation_summary(cls, props)
-    new_path = path + [label]+ annotation_values
-
-    if not subclasses:
-        all_paths.append((depth, new_path))
-    else:
-        for sub in subclasses:
-            traverse_class(sub, new_path, all_paths, props, depth+1)
-    
-def extract_class_hierarchy_with_annotations(owl_file, output_txt):
-    ontology = get_ontology(owl_file).load()
-    skos = get_ontology("http://www.w3.org/2004/02/skos/core").load()
+def get_annotation_summary(cls, annotation_table):
+    # to ensure every annotation property in one column and align with the header order 
+    return [column.get(cls.storid, "") for column in annotation_table]
+
+def get_class_unit(cls, annotation_table, unit_cache):
+    # label + annotation values of one class, computed once per class
+    unit = unit_cache.get(cls)
+    if unit is None:
+        unit = unit_cache[cls] = (get_label_or_name(cls), *get_annotation_summary(cls, annotation_table))
+    return unit
+
+def materialize_path(node):
+    # node = (parent_node, unit); walk the shared prefix chain back to the root
+    units = []
+    while node is not None:
+        node, unit = node
+        units.append(unit)
+    units.reverse()
+    return [value for unit in units for value in unit]
+
+def path_labels(node):
+    labels = []
+    while node is not None:
+        node, unit = node
+        labels.append(unit[0])
+    return labels[::-1]
+
+# traverse (iterative, depth-first in subclasses() order)
+def traverse_class(root, annotation_table, unit_cache=None, expanded=None):
+    # Yields (depth, path_node, ref) per output row. Path prefixes are shared
+    # tuples, not copied lists. With `expanded` (a dict), a class whose subtree
+    # was already written under another parent gets a single row whose ref
+    # points to the first listing instead of repeating the subtree.
+    unit_cache = {} if unit_cache is None else unit_cache
+    stack = [(root, None, 1, frozenset())]
+    while stack:
+        cls, parent_node, depth, ancestors = stack.pop()
+        node = (parent_node, get_class_unit(cls, annotation_table, unit_cache))
+        subclasses = [sub for sub in cls.subclasses() if sub not in ancestors]
+
+        if not subclasses:
+            yield depth, node, ""
+            continue
+        if expanded is not None:
+            if cls in expanded:
+                yield depth, node, expanded[cls]
+                continue
+            expanded[cls] = " > ".join(path_labels(node))
+
+        ancestors = ancestors | {cls}
+        for sub in reversed(subclasses):
+            stack.append((sub, node, depth + 1, ancestors))
+
+def hierarchy_depth(top_level_classes):
+    # Longest root-to-leaf path (in classes), memoized per class so shared
+    # subtrees are measured once; edges back into the current path are skipped
+    # like in traverse_class.
+    heights = {}
+    on_path = set()
+    for root in top_level_classes:
+        stack = [(root, False)]
+        while stack:
+            cls, done = stack.pop()
+            if done:
+                on_path.discard(cls)
+                heights[cls] = 1 + max((heights.get(sub, 0) for sub in cls.subclasses() if sub not in on_path), default=0)
+                continue
+            if cls in heights or cls in on_path:
+                continue
+            on_path.add(cls)
+            stack.append((cls, True))
+            stack.extend((sub, False) for sub in cls.subclasses() if sub not in heights and sub not in on_path)
+    return max((heights[root] for root in top_level_classes), default=0)
+
+def extract_class_hierarchy_with_annotations(owl_file, output_path, txt_path=None, cache_dir=None, dedupe_subtrees=False, verbose=False,
+                                             world=None):
+    from owlready2 import Thing, rdfs
+    from owl_common.ontology_cache import load_ontologies
+    from owl_common.vocabularies import load_skos, register_local_vocabularies
+    from owl_common.xlsx_writer import StreamingSheetWriter
+
+    register_local_vocabularies()
+    with phase("read"):
+        ontology, = load_ontologies([owl_file], cache_dir, world)
+        skos = load_skos(ontology.world)
 
     annotation_property_dict = {}
 
@@ -45,11 +118,6 @@ def extract_class_hierarchy_with_annotations(owl_file, output_txt):
     for prop in skos.annotation_properties():
         annotation_property_dict[prop.name] = prop
     
-    for cls in ontology.classes():
-        val = annotation_property_dict["definition"][cls]
-        print(cls.name, "skos:definition:", val[0] if val else "")
-    
-    print(annotation_property_dict)
     annotation_props = [
         rdfs.comment,
         annotation_property_dict["definition"],
@@ -58,18 +126,33 @@ def extract_class_hierarchy_with_annotations(owl_file, output_txt):
         annotation_property_dict["UMLS_CUI"],
         annotation_property_dict["UMLS_Semantic_Types"]
     ] # can add more annotation properties 
+    with phase("normalize") as p:
+        annotation_table = fetch_annotation_table(ontology.world, annotation_props)
+        p.items = sum(len(column) for column in annotation_table)
 
-    all_paths = []
+    if verbose:
+        print(annotation_property_dict)
+        definitions = annotation_table[1]
+        for cls in ontology.classes():
+            print(cls.name, "skos:definition:", definitions.get(cls.storid, ""))
 
     top_level_classes = [
         cls for cls in ontology.classes()
         if Thing in cls.is_a or cls.is_a == []
     ]
 
-    for top_cls in top_level_classes:
-        traverse_class(top_cls, [], all_paths, annotation_props)
+    unit_cache = {}
 
-    max_depth = max(depth for depth, _ in all_paths)
+    # The header needs the depth before the first row is streamed out. Every
+    # path is listed in full mode, so that is the longest path; with deduped
+    # subtrees the rows actually written decide it, which takes a dry run.
+    with phase("traverse"):
+        if dedupe_subtrees:
+            expanded = {}
+            max_depth = max((depth for top_cls in top_level_classes
+                             for depth, _, _ in traverse_class(top_cls, annotation_table, unit_cache, expanded)), default=0)
+        else:
+            max_depth = hierarchy_depth(top_level_classes)
 
     num_annos = len(annotation_props)
     header = []
@@ -77,28 +160,35 @@ def extract_class_hierarchy_with_annotations(owl_file, output_txt):
         header.append(f"Level{i+1}_Label")
         for j in range(num_annos):
             header.append(f"Level{i+1}_Anno{j+1}")
-
-    with open(output_txt, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter="\t")
-        writer.writerow(header)
-        for _, path in all_paths:
-            row = []
-            unit_size = 1 + num_annos
-            total_units = len(path) // unit_size
-
-            for level in range(max_depth):
-                if level < total_units:
-                    start = level * unit_size
-                    row.extend(path[start : start + unit_size])  # label + annotation1 + annotation2 + ...
-                else:
-                    row.extend([""] * unit_size)
-
-            writer.writerow(row)
-        
-    print(f"Saved to: {output_txt}")
+    if dedupe_subtrees:
+        header.append("Subtree_Ref")
+
+    expanded = {} if dedupe_subtrees else None
+    unit_size = 1 + num_annos
+    # A failure mid-traversal removes the partial output instead of saving it
+    with StreamingSheetWriter(output_path, header, tsv_path=txt_path) as writer:
+        with phase("traverse") as p:
+            for top_cls in top_level_classes:
+                for _, node, ref in traverse_class(top_cls, annotation_table, unit_cache, expanded):
+                    row = materialize_path(node)
+                    row.extend([""] * (max_depth * unit_size - len(row)))  # pad the levels below this path
+                    if dedupe_subtrees:
+                        row.append(ref)
+                    writer.writerow(row)
+            p.items = writer.rows
+        with phase("serialize", items=writer.rows):
+            writer.close()
+
+    if writer.sheets > 1:
+        print(f"{writer.rows} rows split over {writer.sheets} sheets")
+    print(f"Saved to: {output_path}")
+    if txt_path:
+        print(f"Saved to: {txt_path}")
 
 
 def txt2excel(txt_file, excel_file):
+    import pandas as pd
+
     df = pd.read_csv(txt_file, sep="\t", index_col=None, dtype=str)
 
     df.to_excel(excel_file, index=False)
@@ -109,8 +199,15 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract OWL classes and annotation properties to Excel")
     parser.add_argument("-i", "--input", required=True, help="Path to OWL file")
     parser.add_argument("-o", "--output", required=True, help="Output Excel file name")
+    parser.add_argument("--txt", help="Optional: also write the rows to this TXT file (UTF-8 tab-delimited)")
+    parser.add_argument("--dedupe-subtrees", action="store_true",
+                        help="List a subtree reached through several parents once; other occurrences get a Subtree_Ref column")
+    parser.add_argument("--cache-dir", help="Optional: reuse parsed ontologies cached in this directory (keyed by file content)")
+    add_instrumentation_arguments(parser)  # -v also prints annotation properties and every class definition
     args = parser.parse_args()
+    instrumentation = configure_from_args("owl2excel_classes_annotations", args)
+    preload("owlready2", "openpyxl")
 
-    output_txt = args.output.replace(".xlsx", ".txt")
-    extract_class_hierarchy_with_annotations(args.input, output_txt)
-    txt2excel(output_txt, args.output)
+    extract_class_hierarchy_with_annotations(args.input, args.output, txt_path=args.txt, cache_dir=args.cache_dir,
+                                            dedupe_subtrees=args.dedupe_subtrees, verbose=args.verbose > 0)
+    instrumentation.close()
@@ -1,43 +1,106 @@
-import pandas as pd
-from owlready2 import get_ontology
+import os
+import sys
 import argparse
 
-def extract_properties_to_excel(owl_path, output_path):
-    onto = get_ontology(owl_path).load()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import phase, preload, add_instrumentation_arguments, configure_from_args
 
-    records = []
+ENGINES = ("owlready2", "scan")
+HEADER = ["name", "property", "domain", "range"]
 
+def owlready2_property_rows(onto):
     # 1. ObjectProperty
     for prop in onto.object_properties():
         label = prop.label.first() if prop.label else prop.name
         domains = [cls.label.first() if cls.label else cls.name for cls in prop.domain]
         ranges = [cls.label.first() if cls.label else cls.name for cls in prop.range]
-        records.append({
-            "name": label,
-            "property": "object property",
-            "domain": "; ".join(domains) if domains else "",
-            "range": "; ".join(ranges) if ranges else ""
-        })
+        yield [label, "object property", "; ".join(domains), "; ".join(ranges)]
 
     # 2. DataProperty
     for prop in onto.data_properties():
         label = prop.label.first() if prop.label else prop.name
         domains = [cls.label.first() if cls.label else cls.name for cls in prop.domain]
         ranges = [r.name if hasattr(r, "name") else str(r) for r in prop.range]
-        records.append({
-            "name": label,
-            "property": "data property",
-            "domain": "; ".join(domains) if domains else "",
-            "range": "; ".join(ranges) if ranges else ""
-        })
-
-    # 3. Save to Excel
-    df = pd.DataFrame(records)
-    df.to_excel(output_path, index=False)
+        yield [label, "data property", "; ".join(domains), "; ".join(ranges)]
+
+def scan_property_rows(owl_path):
+    # Same rows from one pass over the RDF/XML, without building the ontology:
+    # only the property statements and the first label of each entity are
+    # kept. The file is read here; the returned generator only formats rows.
+    from owlready2.base import _universal_iri_2_abbrev, _universal_abbrev_2_datatype
+    from owl_common.rdfxml_scanner import iter_rdfxml_statements, entity_name, RDF_TYPE, RDFS_LABEL, PROPERTY_LINKS
+    from owl_common.triple_writer import RDFS, OWL
+
+    kinds = {}
+    links = {"domain": {}, "range": {}}
+    labels = {}
+    mentioned = {}  # property IRI -> position of its first mention, the order owlready2 lists them in
+    for position, (subject, predicate, value, kind, datatype, lang) in enumerate(iter_rdfxml_statements(owl_path)):
+        if predicate == RDFS_LABEL and kind == "literal":
+            labels.setdefault(subject, value)
+        elif predicate == RDF_TYPE and value in (OWL + "ObjectProperty", OWL + "DatatypeProperty"):
+            kinds.setdefault(subject, value)
+            mentioned.setdefault(subject, position)
+        elif predicate in PROPERTY_LINKS and kind == "resource":
+            mentioned.setdefault(subject, position)
+            mentioned.setdefault(value, position)
+        elif predicate in (RDFS + "domain", RDFS + "range") and kind == "resource":
+            links[predicate[len(RDFS):]].setdefault(subject, []).append(value)
+
+    def label(iri):
+        return labels.get(iri) or entity_name(iri)
+
+    def datatype(iri):
+        # owlready2 lists a known datatype as its Python type
+        python_type = _universal_abbrev_2_datatype.get(_universal_iri_2_abbrev.get(iri))
+        return str(python_type) if python_type else entity_name(iri)
+
+    def rows():
+        ordered = sorted(kinds, key=mentioned.get)
+        for kind, name in ((OWL + "ObjectProperty", "object property"), (OWL + "DatatypeProperty", "data property")):
+            render = label if kind == OWL + "ObjectProperty" else datatype
+            for iri in ordered:
+                if kinds[iri] == kind:
+                    domains = [label(d) for d in links["domain"].get(iri, ())]
+                    ranges = [render(r) for r in links["range"].get(iri, ())]
+                    yield [label(iri), name, "; ".join(domains), "; ".join(ranges)]
+    return rows()
+
+def extract_properties_to_excel(owl_path, output_path, txt_path=None, cache_dir=None, world=None, engine="owlready2"):
+    # output_path: .xlsx, .csv, .tsv/.txt or .parquet; engine "scan" reads
+    # RDF/XML directly instead of loading the ontology
+    from owl_common.xlsx_writer import open_table_writer
+
+    if engine == "scan":
+        with phase("read"):
+            rows = scan_property_rows(owl_path)
+    else:
+        from owl_common.ontology_cache import load_ontologies
+        from owl_common.vocabularies import register_local_vocabularies
+
+        register_local_vocabularies()
+        with phase("read"):
+            onto, = load_ontologies([owl_path], cache_dir, world)
+        rows = owlready2_property_rows(onto)
+
+    # The output (and optional TXT) is created only once the rows can be
+    # produced; they are streamed into it as they are formatted
+    with open_table_writer(output_path, HEADER, tsv_path=txt_path) as writer:
+        with phase("traverse") as p:
+            for row in rows:
+                writer.writerow(row)
+            p.items = writer.rows
+        with phase("serialize", items=writer.rows):
+            writer.close()
+
     print(f"save: {output_path}")
+    if txt_path:
+        print(f"save: {txt_path}")
 
 
 def excel_to_txt(excel_path, txt_path):
+    import pandas as pd
+
     df = pd.read_excel(excel_path)
     df.to_csv(txt_path, sep="\t", index=False)
     print(f" transform {excel_path} into: {txt_path}")
@@ -48,14 +111,27 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="Extract OWL Object/Data properties to Excel and optional TXT")
     parser.add_argument("-i", "--input", required=True, help="Path to input OWL file")
-    parser.add_argument("-o", "--output", required=True, help="Path to output Excel file")
+    parser.add_argument("-o", "--output", required=True, help="Path to output file: .xlsx, .csv, .tsv/.txt or .parquet (needs pyarrow)")
     parser.add_argument("--txt", help="Optional: Path to output TXT file (UTF-8 tab-delimited)")
+    parser.add_argument("--cache-dir", help="Optional: reuse parsed ontologies cached in this directory (keyed by file content)")
+    parser.add_argument("--engine", choices=ENGINES, default="owlready2",
+                        help="owlready2 (default) loads the ontology; scan streams the properties straight from RDF/XML")
+    add_instrumentation_arguments(parser)
 
     args = parser.parse_args()
+    import importlib.util
+    from owl_common.xlsx_writer import TABLE_FORMATS
 
-    df = extract_properties_to_excel(args.input, args.output)
+    if os.path.splitext(args.output)[1].lower() not in TABLE_FORMATS:
+        parser.error(f"--output must end in one of {', '.join(TABLE_FORMATS)}")
+    if args.output.lower().endswith(".parquet") and importlib.util.find_spec("pyarrow") is None:
+        parser.error("Parquet output needs the optional pyarrow package (pip install pyarrow)")
+    if args.engine == "scan" and args.cache_dir:
+        parser.error("--cache-dir only applies to --engine owlready2")
+    instrumentation = configure_from_args("owl2excel_properties", args)
+    preload("owlready2", *{".xlsx": ("openpyxl",), ".parquet": ("pyarrow",)}.get(os.path.splitext(args.output)[1].lower(), ()))
 
-    if args.txt:
-        save_excel_to_txt(df, args.txt)
+    extract_properties_to_excel(args.input, args.output, txt_path=args.txt, cache_dir=args.cache_dir, engine=args.engine)
+    instrumentation.close()
 
 
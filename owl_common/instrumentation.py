@@ -0,0 +1,240 @@
+import importlib
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = ("read", "normalize", "validate", "build", "reason", "traverse", "serialize")
+
+
+def _max_rss_mb():
+    # Process high-water mark so far (ru_maxrss is KiB on Linux, bytes on macOS)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20), 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Phase:
+    """One timed section; code inside the ``with`` block sets ``items``."""
+
+    def __init__(self, name, parent, items=None):
+        self.name = name
+        self.parent = parent
+        self.items = items
+        self.extra = {}
+
+
+class Instrumentation:
+    """Wall time, CPU time, memory and item counts per phase of one tool run.
+
+    Phases nest; every finished phase becomes one record.  With a metrics
+    path ending in ``.jsonl`` each record is appended as it finishes (so a
+    crashed run still leaves its completed phases); any other path gets one
+    JSON document with the records and a per-phase summary when the run
+    closes.  ``profile_phase`` runs cProfile and ``trace_memory_phase``
+    tracemalloc around every occurrence of that phase only.  ``log()``
+    messages are printed only at or below ``verbosity``.
+    """
+
+    def __init__(self, tool, metrics_path=None, profile_phase=None, profile_path=None, trace_memory_phase=None,
+                 verbosity=0):
+        self.tool = tool
+        self.metrics_path = metrics_path
+        self.profile_phase = profile_phase
+        self.profile_path = profile_path or f"{tool}.{profile_phase}.prof"
+        self.trace_memory_phase = trace_memory_phase
+        self.verbosity = verbosity
+        self.records = []
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        self._stack = []
+        self._profiler = None
+        self._profiling = False
+        self._start = (time.perf_counter(), time.process_time())
+
+    def log(self, message, level=1):
+        if self.verbosity >= level:
+            print(message)
+
+    @contextmanager
+    def phase(self, name, items=None):
+        current = Phase(name, self._stack[-1].name if self._stack else None, items)
+        self._stack.append(current)
+        profiling = name == self.profile_phase and not self._profiling
+        tracing = name == self.trace_memory_phase
+        if profiling:
+            import cProfile
+
+            self._profiler = self._profiler or cProfile.Profile()
+            self._profiler.enable()
+            self._profiling = True
+        if tracing:
+            import tracemalloc
+
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield current
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if tracing:
+                self._trace_memory_result(current)
+            if profiling:
+                self._profiler.disable()
+                self._profiling = False
+            self._stack.pop()
+            self._finish(current, wall, cpu)
+
+    def _trace_memory_result(self, current):
+        import tracemalloc
+
+        _, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:10]
+        tracemalloc.stop()
+        current.extra["tracemalloc_peak_mb"] = round(peak / (1 << 20), 1)
+        current.extra["top_allocations"] = [
+            {"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "size_mb": round(stat.size / (1 << 20), 2), "count": stat.count} for stat in top]
+
+    def timed(self, iterable, name):
+        # Wrap an iterator (e.g. streamed sheet rows) in a phase that counts
+        # only the time spent producing items, and the number of items
+        wall = cpu = 0.0
+        count = 0
+        parent = self._stack[-1].name if self._stack else None
+        iterator = iter(iterable)
+        try:
+            while True:
+                w, c = time.perf_counter(), time.process_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    wall += time.perf_counter() - w
+                    cpu += time.process_time() - c
+                count += 1
+                yield item
+        finally:
+            self._finish(Phase(name, parent, count), wall, cpu)
+
+    def _finish(self, current, wall, cpu):
+        record = {
+            "tool": self.tool,
+            "run": self.run_id,
+            "phase": current.name,
+            "parent": current.parent,
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(cpu, 4),
+            "rss_mb": _rss_mb(),
+            "max_rss_mb": _max_rss_mb(),
+            "items": current.items,
+        }
+        record.update(current.extra)
+        self.records.append(record)
+        if self.metrics_path and self.metrics_path.endswith(".jsonl"):
+            import json
+
+            with open(self.metrics_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def summary(self):
+        # {phase: totals over every occurrence}; nested phases are also part of their parent's time
+        phases = {}
+        for record in self.records:
+            total = phases.setdefault(record["phase"], {"count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                                                        "items": 0, "max_rss_mb": None})
+            total["count"] += 1
+            total["wall_seconds"] = round(total["wall_seconds"] + record["wall_seconds"], 4)
+            total["cpu_seconds"] = round(total["cpu_seconds"] + record["cpu_seconds"], 4)
+            total["items"] += record["items"] or 0
+            if record["max_rss_mb"] is not None:
+                total["max_rss_mb"] = max(total["max_rss_mb"] or 0, record["max_rss_mb"])
+        return phases
+
+    def preload(self, modules):
+        # Import the libraries a run needs under one "import" phase, timing
+        # each; the tools import them lazily, so --help and argument errors
+        # stay fast.  Per-module detail: python -X importtime.
+        seconds = {}
+        before = len(sys.modules)
+        with self.phase("import") as current:
+            for name in modules:
+                wall = time.perf_counter()
+                importlib.import_module(name)
+                seconds[name] = round(time.perf_counter() - wall, 4)
+            current.items = len(sys.modules) - before  # modules loaded, dependencies included
+            current.extra["modules"] = seconds
+        self.log(f"Imports took {sum(seconds.values()):.2f}s: " + ", ".join(f"{name} {t:.2f}s" for name, t in seconds.items()))
+
+    def close(self):
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.process_time() - self._start[1]
+        self._finish(Phase("total", None), wall, cpu)
+        if self._profiler is not None:
+            self._profiler.dump_stats(self.profile_path)
+            print(f"Saved profile of phase '{self.profile_phase}' to: {self.profile_path}")
+        if self.metrics_path and not self.metrics_path.endswith(".jsonl"):
+            import json
+
+            with open(self.metrics_path, "w", encoding="utf-8") as f:
+                json.dump({"tool": self.tool, "run": self.run_id, "phases": self.summary(), "records": self.records},
+                          f, indent=2)
+        if self.metrics_path:
+            print(f"Saved metrics to: {self.metrics_path}")
+
+
+# The instrumentation of the running tool; a silent default until configure()
+_current = Instrumentation("owl_tool")
+
+
+def configure(tool, metrics_path=None, profile_phase=None, profile_path=None, trace_memory_phase=None, verbosity=0):
+    global _current
+    _current = Instrumentation(tool, metrics_path, profile_phase, profile_path, trace_memory_phase, verbosity)
+    return _current
+
+
+def current():
+    return _current
+
+
+def phase(name, items=None):
+    return _current.phase(name, items)
+
+
+def timed(iterable, name="read"):
+    return _current.timed(iterable, name)
+
+
+def log(message, level=1):
+    _current.log(message, level)
+
+
+def preload(*modules):
+    _current.preload(modules)
+
+
+def add_instrumentation_arguments(parser):
+    group = parser.add_argument_group("instrumentation")
+    group.add_argument("--metrics", help="Write per-phase time/CPU/memory/item counts to this file (.jsonl: one line per phase, else JSON)")
+    group.add_argument("--profile", choices=PHASES, help="Run cProfile around this phase")
+    group.add_argument("--profile-output", help="Where to save the cProfile stats (default: <tool>.<phase>.prof)")
+    group.add_argument("--trace-memory", choices=PHASES, help="Record tracemalloc peak and top allocations of this phase")
+    group.add_argument("-v", "--verbose", action="count", default=0, help="Print per-row/per-entity details (-vv for more)")
+
+
+def configure_from_args(tool, args):
+    return configure(tool, args.metrics, args.profile, args.profile_output, args.trace_memory, args.verbose)
@@ -0,0 +1,244 @@
+import json
+import os
+import uuid
+from contextlib import ExitStack, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent runs are not coordinated
+    fcntl = None
+
+from owl_common.ontology_cache import file_digest
+
+INDEX_FORMAT = 2
+DEFAULT_BLOCK_SIZE = 1000
+
+# Entities numbered under each prefix: classes "00019", object properties "R00000", data properties "D00000"
+PREFIX_ENTITIES = {"": "classes", "R": "object_properties", "D": "data_properties"}
+
+
+def highest_number(entities, base_iri, prefix=""):
+    # Highest N among the entities named base_iri + prefix + N (-1 for none)
+    start = len(base_iri) + len(prefix)
+    highest = -1
+    for entity in entities:
+        iri = entity.iri
+        if iri.startswith(base_iri) and iri.startswith(prefix, len(base_iri)) and iri[start:].isdigit():
+            highest = max(highest, int(iri[start:]))
+    return highest
+
+
+def ontology_scans(onto, base_iri, prefixes=tuple(PREFIX_ENTITIES)):
+    # The scans IRIAllocator runs for an in-memory ontology, one per prefix
+    return {prefix: (lambda prefix=prefix: highest_number(getattr(onto, PREFIX_ENTITIES[prefix])(), base_iri, prefix))
+            for prefix in prefixes}
+
+
+def index_path(cache_dir, digest):
+    return os.path.join(cache_dir, f"iri-index-{digest}.json")
+
+
+def sidecar_path(owl_path):
+    return owl_path + ".iri-index.json"
+
+
+def user_cache_dir():
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "owl-excel-tool")
+
+
+def _writable(directory):
+    return os.path.isdir(directory) and os.access(directory, os.W_OK)
+
+
+def default_index_path(owl_path, digest):
+    # Index location without --cache-dir: a sidecar next to the ontology, else
+    # the per-user cache, else None (this run keeps its index in memory)
+    if _writable(os.path.dirname(os.path.abspath(owl_path))):
+        return sidecar_path(owl_path)
+    cache_dir = user_cache_dir()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return None
+    return index_path(cache_dir, digest) if _writable(cache_dir) else None
+
+
+def _empty_index(digest=None):
+    return {"format": INDEX_FORMAT, "digest": digest, "marks": {}, "leases": []}
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def locked_index(path, digest):
+    """Read-modify-write of the index file ``path`` under an exclusive lock.
+
+    Yields the stored index (a fresh one if it is missing, unreadable, of
+    another format or for another ``digest``); on a clean exit it is written
+    to a temporary file and renamed over ``path``, so readers never see a
+    partial index.  Raises OSError when the directory cannot be written.
+    """
+    with open(path + ".lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            index = _empty_index(digest)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    stored = json.load(f)
+                if stored.get("format") == INDEX_FORMAT and stored.get("digest") == digest:
+                    index = stored
+            except (OSError, ValueError):
+                pass
+            # Released leases still fence off their ranges until no run holds a live one
+            if not any(not lease["released"] and _pid_alive(lease["pid"]) for lease in index["leases"]):
+                index["leases"] = []
+            yield index
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2)
+            os.replace(tmp_path, path)
+        finally:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class IRIAllocator:
+    """Hands out numeric IRI suffixes per prefix ("" for class IDs, "R", "D").
+
+    ``scans`` maps each prefix to a callable returning its highest number in
+    the ontology (-1 for none), see ``ontology_scans``.  The results are
+    kept per base IRI and prefix in an index keyed by the content hash of
+    ``owl_path``, so only prefixes missing from it are scanned.  The index
+    is ``<cache_dir>/iri-index-<sha256>.json``; without ``cache_dir`` it is
+    the sidecar ``<owl_path>.iri-index.json`` if that directory is
+    writable, else ``iri-index-<sha256>.json`` in the per-user cache
+    (``$XDG_CACHE_HOME/owl-excel-tool``, by default ``~/.cache``).
+    Numbers are then leased in blocks under a file lock, so concurrent runs
+    on the same ontology get disjoint ranges.  Leases are forgotten once
+    every run holding one has closed (or died), so the next run on an
+    unchanged file starts from the same number again.  Without ``owl_path``,
+    or when no index can be written, every scan runs and nothing is stored.
+    """
+
+    def __init__(self, owl_path, base_iri, scans, cache_dir=None, block_size=DEFAULT_BLOCK_SIZE):
+        self.cache_dir = cache_dir
+        self.base_iri = base_iri
+        self.block_size = block_size
+        self.digest = file_digest(owl_path) if owl_path else None
+        self.path = self._locate(owl_path, self.digest) if owl_path else None
+        self._memory_index = _empty_index()
+        self._blocks = {}  # prefix -> [next, stop]
+        self._used = {}  # prefix -> highest number handed out
+        self._owner = uuid.uuid4().hex  # tells this allocator's leases from others in the same process
+
+        with self._index() as index:
+            marks = index["marks"].setdefault(base_iri, {})
+            missing = [prefix for prefix in scans if prefix not in marks]
+            for prefix in missing:
+                marks[prefix] = scans[prefix]()
+            if missing and self.path:
+                print(f"Indexed IRI high-water marks: {self.path}")
+        self.marks = marks
+
+    def _locate(self, owl_path, digest):
+        if self.cache_dir:
+            return index_path(self.cache_dir, digest)
+        return default_index_path(owl_path, digest)
+
+    @contextmanager
+    def _index(self):
+        # The shared index under its lock, or this run's in-memory one
+        if self.path:
+            stack = ExitStack()
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                index = stack.enter_context(locked_index(self.path, self.digest))
+            except OSError as e:
+                self._disable(e)
+            else:
+                saved = False
+                try:
+                    with stack:
+                        yield index
+                        saved = True
+                except OSError as e:
+                    if not saved:
+                        raise
+                    # The update could not be written; this run keeps it in memory
+                    self._memory_index = index
+                    self._disable(e)
+                return
+        yield self._memory_index
+
+    def _disable(self, error):
+        # Read-only or unreachable cache: continue with what this run knows
+        print(f"IRI index not usable, continuing in memory: {error}")
+        self.path = None
+
+    def high_water(self, prefix):
+        return self.marks.get(prefix, -1)
+
+    def next_id(self, prefix="", first=0):
+        # Next free number for prefix; never below `first`
+        block = self._blocks.get(prefix)
+        if block is None or block[0] >= block[1]:
+            block = self._blocks[prefix] = self._reserve(prefix, first)
+        number = block[0]
+        block[0] += 1
+        self._used[prefix] = number
+        return number
+
+    def _reserve(self, prefix, first):
+        with self._index() as index:
+            start = max(self.high_water(prefix) + 1, first)
+            if prefix in self._used:
+                start = max(start, self._used[prefix] + 1)
+            for lease in index["leases"]:
+                if lease["base_iri"] == self.base_iri and lease["prefix"] == prefix:
+                    start = max(start, lease["stop"])
+            stop = start + self.block_size
+            index["leases"].append({"pid": os.getpid(), "owner": self._owner, "base_iri": self.base_iri,
+                                    "prefix": prefix, "start": start, "stop": stop, "released": False})
+        return [start, stop]
+
+    def record(self, output_path):
+        # Index a file saved by this run, so the next run on it skips the scan
+        marks = dict(self.marks)
+        for prefix, number in self._used.items():
+            marks[prefix] = max(marks.get(prefix, -1), number)
+        digest = file_digest(output_path)
+        path = self._locate(output_path, digest)
+        if not path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with locked_index(path, digest) as index:
+                stored = index["marks"].setdefault(self.base_iri, {})
+                for prefix, number in marks.items():
+                    stored[prefix] = max(stored.get(prefix, -1), number)
+        except OSError as e:
+            print(f"IRI index not saved for {output_path}: {e}")
+
+    def close(self):
+        if not self._blocks:
+            return
+        with self._index() as index:
+            for lease in index["leases"]:
+                if lease["owner"] == self._owner:
+                    lease["released"] = True
+        self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
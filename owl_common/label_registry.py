@@ -0,0 +1,48 @@
+import sqlite3
+
+
+class LabelRegistry:
+    """Persistent formalized label -> class ID mapping shared across excel2owl runs.
+
+    IDs are handed out once and never reused, so inserting or deleting rows in
+    the sheet does not renumber the other classes.  The registry also keeps a
+    digest of every class record from the last build, which drives
+    incremental rebuilds.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS labels (label TEXT PRIMARY KEY, class_id TEXT NOT NULL UNIQUE);
+            CREATE TABLE IF NOT EXISTS digests (class_id TEXT PRIMARY KEY, digest TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.ids = dict(self.conn.execute("SELECT label, class_id FROM labels"))
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()
+        self.next_id = int(row[0]) if row else 0
+        self._new = []
+
+    def class_id(self, label):
+        class_id = self.ids.get(label)
+        if class_id is None:
+            class_id = f"{self.next_id:05d}"
+            self.next_id += 1
+            self.ids[label] = class_id
+            self._new.append((label, class_id))
+        return class_id
+
+    def digests(self):
+        return dict(self.conn.execute("SELECT class_id, digest FROM digests"))
+
+    def save(self, digests=None):
+        with self.conn:
+            self.conn.executemany("INSERT INTO labels (label, class_id) VALUES (?, ?)", self._new)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)", (str(self.next_id),))
+            if digests is not None:
+                self.conn.execute("DELETE FROM digests")
+                self.conn.executemany("INSERT INTO digests (class_id, digest) VALUES (?, ?)", digests.items())
+        self._new = []
+
+    def close(self):
+        self.conn.close()
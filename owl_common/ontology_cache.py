@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+from owl_common.ontology_writer import open_input
+
+CACHE_FORMAT = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(paths):
+    # Content hashes of all sources (in order) plus the parser version
+    import owlready2
+
+    key = hashlib.sha256(f"{CACHE_FORMAT}|{owlready2.VERSION}".encode())
+    for path in paths:
+        key.update(file_digest(path).encode())
+    return key.hexdigest()
+
+
+def _load(world, path):
+    # owlready2 reads RDF/XML and N-Triples; .gz files are decompressed on the fly
+    if path.endswith(".gz"):
+        with open_input(path) as f:
+            return world.get_ontology(path).load(fileobj=f)
+    return world.get_ontology(path).load()
+
+
+def _world_is_empty(world):
+    return not world.graph or len(world.graph) <= 1  # 1 is owlready2's http://anonymous ontology
+
+
+def snapshot_world(world, path):
+    """Copy the quadstore of ``world`` into the SQLite file ``path``."""
+    world.graph.commit()
+    target = sqlite3.connect(path)
+    world.graph.db.backup(target)
+    target.close()
+
+
+def restore_world(world, path):
+    """Use a copy of the snapshot ``path`` as the quadstore of the empty ``world``.
+
+    The file is opened read-only and copied into memory with SQLite's page
+    backup (owlready2 writes to the database it opens), so several processes
+    can restore one snapshot at once.
+    """
+    source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    memory = sqlite3.connect(":memory:", check_same_thread=False, isolation_level="EXCLUSIVE")
+    source.backup(memory)
+    source.close()
+    world.set_backend(filename=path, connection=memory)
+
+
+def load_ontologies(paths, cache_dir=None, world=None):
+    """Load ontology files (RDF/XML or N-Triples, optionally .gz) into `world` (default: owlready2's default_world).
+
+    With ``cache_dir``, the parsed quadstore for this exact set of file contents
+    is kept as ``<cache_dir>/<sha256>.sqlite3``.  Later runs with unchanged
+    sources restore it with SQLite's page-level backup into an in-memory
+    quadstore instead of reparsing, so the cache file itself is never modified.
+    Returns the ontologies in the order of ``paths``.
+    """
+    from owlready2 import default_world
+
+    world = world or default_world
+    if not cache_dir:
+        return [_load(world, path) for path in paths]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    key = cache_key(paths)
+    db_path = os.path.join(cache_dir, f"{key}.sqlite3")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+
+    if os.path.exists(db_path) and os.path.exists(meta_path):
+        if not _world_is_empty(world):
+            print("Ontology cache skipped: world already holds triples")
+            return [_load(world, path) for path in paths]
+
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        restore_world(world, db_path)
+
+        ontologies = []
+        for iri in meta["ontologies"]:
+            onto = world.get_ontology(iri)
+            onto.loaded = True  # already in the quadstore, never re-read the source
+            ontologies.append(onto)
+        print(f"Loaded {len(paths)} ontologies from cache: {db_path}")
+        return ontologies
+
+    # Cache miss: parse as usual, then snapshot the quadstore before any change
+    ontologies = [_load(world, path) for path in paths]
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    snapshot_world(world, tmp_path)
+    with open(f"{meta_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"sources": [os.path.abspath(p) for p in paths],
+                   "ontologies": [onto.base_iri for onto in ontologies]}, f, indent=2)
+    os.replace(tmp_path, db_path)
+    os.replace(f"{meta_path}.{os.getpid()}.tmp", meta_path)
+    print(f"Cached parsed ontologies: {db_path}")
+    return ontologies
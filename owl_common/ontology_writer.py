@@ -0,0 +1,256 @@
+import os
+
+from owl_common.triple_writer import FORMATS, STANDARD_PREFIXES, _nt_escape
+
+DEFAULT_CHUNK_SIZE = 100000  # triples per partition
+RDF_EXTENSIONS = {"rdfxml": ".owl", "ntriples": ".nt", "turtle": ".ttl"}
+LINE_FORMATS = ("ntriples", "turtle")  # every statement ends its line, so partitions concatenate
+
+# Rows of one ontology (quadstore context c) with the IRIs resolved by SQLite,
+# either in one rowid range or for some subjects; ordered like owlready2's own
+# ntriples output
+OBJ_SELECT = """SELECT q.rowid, q.s, rs.iri, rp.iri, q.o, ro.iri FROM objs q
+LEFT JOIN resources rs ON rs.storid = q.s LEFT JOIN resources rp ON rp.storid = q.p
+LEFT JOIN resources ro ON ro.storid = q.o"""
+DATA_SELECT = """SELECT q.rowid, q.s, rs.iri, rp.iri, q.o, q.d, rd.iri FROM datas q
+LEFT JOIN resources rs ON rs.storid = q.s LEFT JOIN resources rp ON rp.storid = q.p
+LEFT JOIN resources rd ON rd.storid = q.d"""
+SELECTS = {"objs": OBJ_SELECT, "datas": DATA_SELECT}
+RANGE_WHERE = " WHERE q.c = ? AND q.rowid >= ? AND q.rowid < ? ORDER BY q.rowid"
+SUBJECTS_WHERE = " WHERE q.c = ? AND q.s IN ({})"
+SUBJECTS_PER_QUERY = 500  # below SQLite's bound-parameter limit
+LAST_ROWID = (1 << 63) - 1
+
+_worker = {}
+
+
+def open_output(path, text=False):
+    # Output file for writing, gzip-compressed when the path ends in .gz
+    if path.endswith(".gz"):
+        import gzip
+
+        return gzip.open(path, "wt" if text else "wb", **({"encoding": "utf-8"} if text else {}))
+    return open(path, "w" if text else "wb", **({"encoding": "utf-8"} if text else {}))
+
+
+def open_input(path):
+    # Binary input file, decompressed on the fly when the path ends in .gz
+    if path.endswith(".gz"):
+        import gzip
+
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+class _Terms:
+    # N-Triples or Turtle spelling of subjects, predicates, objects and literals
+
+    def __init__(self, fmt, base_iri):
+        self.turtle = fmt == "turtle"
+        self.prefixes = [(ns, f"{prefix}:") for prefix, ns in STANDARD_PREFIXES.items()]
+        if base_iri:
+            self.prefixes.append((base_iri, ":"))
+        self._names = {}  # iri -> Turtle prefixed name or <iri>
+
+    def resource(self, storid, iri):
+        if storid < 0:
+            return f"_:{-storid}"
+        if not self.turtle:
+            return f"<{iri}>"
+        name = self._names.get(iri)
+        if name is None:
+            name = f"<{iri}>"
+            for ns, prefix in self.prefixes:
+                local = iri[len(ns):]
+                if iri.startswith(ns) and local.replace("_", "a").isalnum():
+                    name = prefix + local
+                    break
+            self._names[iri] = name
+        return name
+
+    def literal(self, value, datatype, datatype_iri):
+        text = f'"{_nt_escape(value) if isinstance(value, str) else value}"'
+        if isinstance(datatype, str) and datatype.startswith("@"):
+            return text + datatype
+        if not datatype or datatype_iri is None:
+            return text
+        return f"{text}^^{self.resource(datatype, datatype_iri)}"
+
+
+def header(fmt, base_iri):
+    # Prefix declarations the Turtle statements rely on (nothing for N-Triples)
+    if fmt != "turtle":
+        return ""
+    lines = [f"@prefix {prefix}: <{ns}> ." for prefix, ns in STANDARD_PREFIXES.items()]
+    if base_iri:
+        lines.append(f"@prefix : <{base_iri}> .")
+    return "\n".join(lines) + "\n\n"
+
+
+def _statements(terms, table, rows):
+    # (subject, predicate, object) texts of objs or datas rows (rowid first)
+    rdf_type = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+    if table == "objs":
+        return [(terms.resource(s, s_iri), "a" if terms.turtle and p == rdf_type else terms.resource(1, p),
+                 terms.resource(o, o_iri)) for _, s, s_iri, p, o, o_iri in rows]
+    return [(terms.resource(s, s_iri), terms.resource(1, p), terms.literal(o, d, d_iri))
+            for _, s, s_iri, p, o, d, d_iri in rows]
+
+
+def _lines(terms, statements):
+    if not terms.turtle:
+        return "".join(f"{s} {p} {o} .\n" for s, p, o in statements)
+    # Turtle: consecutive statements about one subject share it with ';'
+    lines = []
+    last = None
+    for s, p, o in statements:
+        if s == last:
+            lines.append(f" ;\n    {p} {o}")
+        else:
+            if last is not None:
+                lines.append(" .\n")
+            lines.append(f"{s} {p} {o}")
+            last = s
+    if last is not None:
+        lines.append(" .\n")
+    return "".join(lines)
+
+
+def render_partition(db, fmt, base_iri, c, table, start, stop):
+    # Text of the statements in one rowid range of objs or datas
+    terms = _Terms(fmt, base_iri)
+    return _lines(terms, _statements(terms, table, db.execute(SELECTS[table] + RANGE_WHERE, (c, start, stop))))
+
+
+def render_subjects(db, fmt, base_iri, c, storids):
+    # Text of the statements whose subject is one of storids, in the order of the full output
+    terms = _Terms(fmt, base_iri)
+    storids = sorted(storids)
+    statements = []
+    for table in ("objs", "datas"):
+        rows = []
+        for i in range(0, len(storids), SUBJECTS_PER_QUERY):
+            chunk = storids[i:i + SUBJECTS_PER_QUERY]
+            rows.extend(db.execute(SELECTS[table] + SUBJECTS_WHERE.format(",".join("?" * len(chunk))), (c, *chunk)))
+        rows.sort(key=lambda row: row[0])
+        statements.extend(_statements(terms, table, rows))
+    return _lines(terms, statements)
+
+
+def subject_closure(db, c, storids):
+    # storids plus every blank node (class expression, list) reachable from their objects
+    keep = set(storids)
+    queue = list(keep)
+    while queue:
+        for (o,) in db.execute("SELECT o FROM objs WHERE c = ? AND s = ? AND o < 0", (c, queue.pop())):
+            if o not in keep:
+                keep.add(o)
+                queue.append(o)
+    return keep
+
+
+def partitions(db, c, chunk_size=DEFAULT_CHUNK_SIZE):
+    # (table, start, stop) rowid ranges of about chunk_size statements each
+    for table in ("objs", "datas"):
+        starts = [rowid for n, (rowid,) in enumerate(db.execute(f"SELECT rowid FROM {table} WHERE c = ? ORDER BY rowid", (c,)))
+                  if n % chunk_size == 0]
+        for start, stop in zip(starts, starts[1:] + [LAST_ROWID]):
+            yield table, start, stop
+
+
+def _encode(text, compress):
+    # gzip members can be concatenated; mtime=0 keeps the bytes reproducible
+    data = text.encode("utf-8")
+    if not compress:
+        return data
+    import gzip
+
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _init_worker(db_path):
+    import sqlite3
+
+    _worker["db"] = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def _render_task(task):
+    fmt, base_iri, c, table, start, stop, compress = task
+    return _encode(render_partition(_worker["db"], fmt, base_iri, c, table, start, stop), compress)
+
+
+def save_ontology(onto, path, fmt="rdfxml", workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Save ``onto`` to ``path`` as rdfxml, ntriples or turtle; gzip-compressed if the path ends in .gz.
+
+    RDF/XML goes through owlready2's serializer.  N-Triples and Turtle are
+    rendered straight from the quadstore in rowid ranges of ``chunk_size``
+    statements, one statement (or Turtle subject run) per line, and the
+    parts are concatenated in order; with ``workers`` > 1 a snapshot of the
+    quadstore is rendered (and compressed) by that many processes.  The
+    result does not depend on ``workers``.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown RDF format '{fmt}', expected one of {FORMATS}")
+    if fmt not in LINE_FORMATS:
+        with open_output(path) as f:
+            onto.save(file=f, format=fmt)
+        return
+
+    graph = onto.world.graph
+    base_iri = onto.base_iri
+    compress = path.endswith(".gz")
+    tasks = [(fmt, base_iri, onto.graph.c, table, start, stop, compress)
+             for table, start, stop in partitions(graph.db, onto.graph.c, chunk_size)]
+    with open(path, "wb") as f:
+        f.write(_encode(header(fmt, base_iri), compress))
+        if workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                f.write(_encode(render_partition(graph.db, *task[:-1]), compress))
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        import sqlite3
+        import tempfile
+
+        # Workers read a snapshot, as the quadstore usually lives in this process's memory
+        graph.commit()
+        with tempfile.TemporaryDirectory(prefix="owl-serialize-") as tmp:
+            db_path = os.path.join(tmp, "quadstore.sqlite3")
+            target = sqlite3.connect(db_path)
+            graph.db.backup(target)
+            target.close()
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(db_path,)) as pool:
+                for data in pool.map(_render_task, tasks):
+                    f.write(data)
+
+
+def save_subjects(onto, entities, path, fmt="rdfxml"):
+    """Save only the ontology header and the statements about ``entities`` of ``onto``.
+
+    Blank nodes the entities reference (restrictions, lists) are included.
+    RDF/XML goes through owlready2's serializer with a subject filter;
+    N-Triples and Turtle are the matching lines of ``save_ontology``'s
+    output, so a delta is as compact as the full file per statement.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown RDF format '{fmt}', expected one of {FORMATS}")
+    db = onto.world.graph.db
+    keep = subject_closure(db, onto.graph.c, [onto.storid] + [entity.storid for entity in entities])
+    if fmt not in LINE_FORMATS:
+        with open_output(path) as f:
+            onto.save(file=f, format=fmt, filter=lambda graph, s, p, o, d: s in keep)
+        return
+    compress = path.endswith(".gz")
+    with open(path, "wb") as f:
+        f.write(_encode(header(fmt, onto.base_iri), compress))
+        f.write(_encode(render_subjects(db, fmt, onto.base_iri, onto.graph.c, keep), compress))
+
+
+def add_output_arguments(parser, default="rdfxml"):
+    # --format and --serialize-workers for every script that saves an ontology
+    parser.add_argument("--format", choices=FORMATS, default=default,
+                        help=f"Output RDF syntax (default: {default}); end the output path in .gz to compress it")
+    parser.add_argument("--serialize-workers", type=int, default=1,
+                        help="Render ntriples/turtle output in this many processes (output is identical for any value)")
@@ -0,0 +1,251 @@
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+from owl_common.triple_writer import RDF, RDFS, OWL
+from owl_common.ontology_writer import open_input
+
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+_ABOUT, _ID, _NODE_ID = f"{{{RDF}}}about", f"{{{RDF}}}ID", f"{{{RDF}}}nodeID"
+_RESOURCE, _DATATYPE, _PARSE_TYPE = f"{{{RDF}}}resource", f"{{{RDF}}}datatype", f"{{{RDF}}}parseType"
+_BASE, _LANG = f"{{{XML_NS}}}base", f"{{{XML_NS}}}lang"
+
+RDF_TYPE = RDF + "type"
+RDFS_LABEL, RDFS_COMMENT = RDFS + "label", RDFS + "comment"
+CLASS_TYPES = {OWL + "Class", RDFS + "Class"}
+PROPERTY_LINKS = {OWL + "inverseOf", RDFS + "subPropertyOf", OWL + "equivalentProperty"}
+
+
+def _iri(tag):
+    namespace, _, local = tag[1:].partition("}")
+    return namespace + local
+
+
+def entity_name(iri):
+    # owlready2's Entity.name: the part after the namespace ('#' or last '/')
+    return iri.rsplit("#", 1)[-1] if "#" in iri else iri.rsplit("/", 1)[-1]
+
+
+def _node_statements(elem, base, lang, out):
+    # Statements of one node element; returns its IRI (None for blank nodes,
+    # whose own statements are not reported)
+    base = elem.get(_BASE, base)
+    if elem.get(_ABOUT) is not None:
+        subject = urljoin(base, elem.get(_ABOUT))
+    elif elem.get(_ID) is not None:
+        subject = urljoin(base, "#" + elem.get(_ID))
+    else:
+        subject = None
+
+    if subject is not None and elem.tag != f"{{{RDF}}}Description":
+        out.append((subject, RDF_TYPE, _iri(elem.tag), "resource", None, None))
+
+    for child in elem:
+        if not isinstance(child.tag, str):  # comments / processing instructions
+            continue
+        predicate = _iri(child.tag)
+        child_lang = child.get(_LANG, lang)
+        parse_type = child.get(_PARSE_TYPE)
+        if child.get(_RESOURCE) is not None:
+            obj = (urljoin(child.get(_BASE, base), child.get(_RESOURCE)), "resource", None, None)
+        elif child.get(_NODE_ID) is not None or parse_type in ("Resource", "Collection"):
+            obj = (None, "bnode", None, None)
+        elif len(child) and parse_type != "Literal":
+            nested = _node_statements(child[0], child.get(_BASE, base), child_lang, out)
+            obj = (nested, "resource", None, None) if nested else (None, "bnode", None, None)
+        else:
+            datatype = child.get(_DATATYPE)
+            text = ET.tostring(child[0], encoding="unicode") if len(child) else (child.text or "")
+            obj = (text, "literal", urljoin(base, datatype) if datatype else None, child_lang)
+        if subject is not None:
+            out.append((subject, predicate) + obj)
+    return subject
+
+
+def iter_rdfxml_statements(path):
+    """Stream (subject, predicate, value, kind, datatype, lang) from an RDF/XML file (or .gz).
+
+    ``kind`` is "resource", "bnode" (value None) or "literal".  Only
+    statements about named subjects are reported; blank-node class
+    expressions show up as "bnode" objects.  Each top-level node element is
+    discarded once read, so memory does not grow with the file.
+    """
+    with open_input(path) as f:
+        context = ET.iterparse(f, events=("start", "end"))
+        root = base = lang = None
+        depth = 0
+        for event, elem in context:
+            if event == "start":
+                depth += 1
+                if depth == 1:
+                    root = elem
+                    base = elem.get(_BASE, "")
+                    lang = elem.get(_LANG)
+                continue
+            depth -= 1
+            if depth == 1:
+                out = []
+                _node_statements(elem, base, lang, out)
+                yield from out
+                root.clear()
+
+
+class ScannedClass:
+    """A class read by the scanner, with the attributes the merge step reads."""
+
+    __slots__ = ("iri", "name", "label", "annotations")
+
+    def __init__(self, iri):
+        self.iri = iri
+        self.name = entity_name(iri)
+        self.label = []
+        self.annotations = {}  # property IRI -> [(is_resource, value)]
+
+    def __repr__(self):
+        return self.iri
+
+
+class ClassExpression:
+    # Stand-in for an anonymous domain/range; never a member of any class index
+    def __repr__(self):
+        return "<class expression>"
+
+
+class ScannedProperty:
+    __slots__ = ("iri", "name", "domain", "range", "comment")
+
+    def __init__(self, iri):
+        self.iri = iri
+        self.name = entity_name(iri)
+        self.domain = []
+        self.range = []
+        self.comment = []
+
+
+class ScannedModule:
+    """Branches of an import ontology read straight from its RDF/XML.
+
+    Pass 1 keeps only class IRIs, named subClassOf edges, annotation property
+    declarations and the object/data properties; pass 2 reads labels and
+    annotations of the classes in the branches below ``root_iris``.  Only the
+    selected branches are ever materialized.  Mirrors the parts of the
+    owlready2 API that the merge step uses on the import ontology.
+    """
+
+    def __init__(self, path, root_iris, world):
+        self.path = path
+        self.world = world
+        classes = set()
+        parents = {}
+        annotation_props = []
+        props = {}
+        kinds = {}
+        mentioned = {}  # property IRI -> position of its first mention, owlready2's storid order
+        for position, (subject, predicate, value, kind, datatype, lang) in enumerate(iter_rdfxml_statements(path)):
+            if predicate in PROPERTY_LINKS and kind == "resource":
+                mentioned.setdefault(subject, position)
+                mentioned.setdefault(value, position)
+            if predicate == RDF_TYPE:
+                if value in CLASS_TYPES:
+                    classes.add(subject)
+                elif value == OWL + "AnnotationProperty":
+                    annotation_props.append(subject)
+                elif value in (OWL + "ObjectProperty", OWL + "DatatypeProperty") and subject not in props:
+                    props[subject] = ScannedProperty(subject)
+                    kinds[subject] = value
+                    mentioned.setdefault(subject, position)
+            elif predicate == RDFS + "subClassOf" and kind == "resource":
+                parents.setdefault(subject, []).append(value)
+            elif subject in props and predicate in (RDFS + "domain", RDFS + "range", RDFS_COMMENT):
+                prop = props[subject]
+                if predicate == RDFS_COMMENT:
+                    prop.comment.append(self.literal(value, datatype, lang))
+                elif kind == "bnode":
+                    getattr(prop, predicate[len(RDFS):]).append(ClassExpression())
+                else:
+                    getattr(prop, predicate[len(RDFS):]).append(value)
+
+        # Closure of the requested roots over the subClassOf edges
+        children = {}
+        for child, child_parents in parents.items():
+            for parent in dict.fromkeys(child_parents):
+                children.setdefault(parent, []).append(child)
+        self.classes = {iri: ScannedClass(iri) for iri in root_iris if iri in classes}
+        stack = list(self.classes)
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child in classes and child not in self.classes:
+                    self.classes[child] = ScannedClass(child)
+                    stack.append(child)
+
+        # Python names resolve to the last declaration, like owlready2's world._props
+        by_name = {}
+        for iri in annotation_props:
+            by_name[entity_name(iri)] = iri
+        by_name.setdefault("label", RDFS_LABEL)
+        by_name.setdefault("comment", RDFS_COMMENT)
+        self.copied_properties = sorted(set(by_name.values()))
+
+        # Pass 2: labels and annotations of the module classes only
+        wanted = set(self.copied_properties)
+        for subject, predicate, value, kind, datatype, lang in iter_rdfxml_statements(path):
+            cls = self.classes.get(subject)
+            if cls is None or predicate not in wanted or kind == "bnode":
+                continue
+            entry = (True, value) if kind == "resource" else (False, self.literal(value, datatype, lang))
+            cls.annotations.setdefault(predicate, []).append(entry)
+            if predicate == RDFS_LABEL and kind == "literal":
+                cls.label.append(entry[1])
+
+        others = {}
+        def entity(iri):
+            return self.classes.get(iri) or others.setdefault(iri, ScannedClass(iri))
+
+        self.hierarchy = {cls: [entity(p) for p in dict.fromkeys(parents.get(cls.iri, ()))]
+                          for cls in self.classes.values()}
+        for iri, prop in props.items():
+            prop.domain = [d if isinstance(d, ClassExpression) else entity(d) for d in prop.domain]
+            if kinds[iri] == OWL + "DatatypeProperty":
+                prop.range = [self.datatype(r) for r in prop.range if not isinstance(r, ClassExpression)]
+            else:
+                prop.range = [r if isinstance(r, ClassExpression) else entity(r) for r in prop.range]
+        ordered = sorted(props, key=mentioned.get)
+        self._object_properties = [props[iri] for iri in ordered if kinds[iri] == OWL + "ObjectProperty"]
+        self._data_properties = [props[iri] for iri in ordered if kinds[iri] == OWL + "DatatypeProperty"]
+
+    def literal(self, text, datatype, lang):
+        # Same Python value owlready2 would return for this literal
+        from owlready2 import locstr
+
+        if lang:
+            return locstr(text, lang)
+        if not datatype:
+            return text
+        return self.world._to_python(text, self.world._abbreviate(datatype))
+
+    def datatype(self, iri):
+        from owlready2.base import _universal_abbrev_2_datatype
+
+        return _universal_abbrev_2_datatype.get(self.world._abbreviate(iri)) or self.world[iri]
+
+    def search_one(self, iri):
+        return self.classes.get(iri)
+
+    def object_properties(self):
+        return iter(self._object_properties)
+
+    def data_properties(self):
+        return iter(self._data_properties)
+
+    def get_annotations_to_copy(self, cls, labels):
+        # Same rows as get_annotations_to_copy() in the merge script builds from owlready2
+        annotations = []
+        for prop_iri in self.copied_properties:
+            target_values = list(labels) if prop_iri == RDFS_LABEL else []
+            values = []
+            for is_resource, value in cls.annotations.get(prop_iri, ()):
+                if value not in target_values:
+                    target_values.append(value)
+                    values.append((is_resource, value))
+            if values:
+                annotations.append((prop_iri, values))
+        return annotations
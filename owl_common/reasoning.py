@@ -0,0 +1,208 @@
+import json
+import os
+
+REASONING_MODES = ("full", "closure", "module", "none")
+HIERARCHY_FORMAT = 2
+
+# Objects from these namespaces are vocabulary, never part of a module
+_VOCABULARY_NAMESPACES = (
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "http://www.w3.org/2000/01/rdf-schema#",
+    "http://www.w3.org/2002/07/owl#",
+    "http://www.w3.org/2001/XMLSchema#",
+)
+
+
+def _named(entities):
+    from owlready2 import ThingClass
+
+    return list(dict.fromkeys(e for e in entities if isinstance(e, ThingClass)))
+
+
+def _ancestor_sets(parents):
+    # class -> all strict ancestors, one iterative post-order walk per class
+    ancestors = {}
+    for start in parents:
+        stack = [(start, False)]
+        on_path = set()
+        while stack:
+            cls, done = stack.pop()
+            if done:
+                on_path.discard(cls)
+                result = set()
+                for parent in parents.get(cls, ()):
+                    if parent not in on_path:
+                        result.add(parent)
+                        result |= ancestors.get(parent, set())
+                ancestors[cls] = result
+                continue
+            if cls in ancestors or cls in on_path:
+                continue
+            on_path.add(cls)
+            stack.append((cls, True))
+            stack.extend((p, False) for p in parents.get(cls, ()) if p not in ancestors)
+    return ancestors
+
+
+def _direct_parents(parents):
+    # Drop parents that are already ancestors of another parent, like a reasoner's direct superclasses
+    ancestors = _ancestor_sets(parents)
+    reduced = {}
+    for cls, direct in parents.items():
+        implied = set()
+        for parent in direct:
+            implied |= ancestors.get(parent, set())
+        reduced[cls] = [p for p in direct if p not in implied]
+    return reduced
+
+
+def asserted_hierarchy(onto):
+    """Named direct parents of every class of ``onto``, exactly as asserted."""
+    return {cls: _named(cls.is_a) for cls in onto.classes()}
+
+
+def closure_hierarchy(onto):
+    """Asserted hierarchy plus the named conjuncts of equivalent-class definitions.
+
+    ``A equivalent_to B & (p some C)`` makes ``B`` a parent of ``A``, as a
+    reasoner would.  No other subsumption is inferred, so the result is
+    always contained in the reasoned hierarchy; parents implied through
+    another parent are dropped, like a reasoner's direct superclasses.
+    """
+    from owlready2 import And, ThingClass
+
+    parents = {}
+    for cls in onto.classes():
+        named = _named(cls.is_a)
+        for eq in cls.equivalent_to:
+            if isinstance(eq, ThingClass):
+                named.append(eq)
+            elif isinstance(eq, And):
+                named.extend(part for part in eq.Classes if isinstance(part, ThingClass))
+        parents[cls] = list(dict.fromkeys(p for p in named if p is not cls))
+    return _direct_parents(parents)
+
+
+def _module_triples(onto, seeds):
+    # Outgoing-reference module: the seeds' triples, their blank-node class
+    # expressions, and recursively every named entity they mention
+    import rdflib
+
+    graph = onto.world.as_rdflib_graph()
+    module = rdflib.Graph()
+    queue = [rdflib.URIRef(cls.iri) for cls in seeds]
+    seen = set(queue)
+    while queue:
+        subject = queue.pop()
+        for triple in graph.triples((subject, None, None)):
+            module.add(triple)
+            obj = triple[2]
+            if obj in seen or isinstance(obj, rdflib.Literal) or str(obj).startswith(_VOCABULARY_NAMESPACES):
+                continue
+            seen.add(obj)
+            queue.append(obj)
+    return module
+
+
+def module_hierarchy(onto, roots):
+    """Reason only over the module around the branches below ``roots``.
+
+    The branches come from the asserted hierarchy; the module is written to
+    a separate World, classified there, and the inferred parents replace the
+    asserted ones for its classes.
+    """
+    from owlready2 import World, sync_reasoner
+    import io
+
+    hierarchy = asserted_hierarchy(onto)
+    children = {}
+    for cls, parents in hierarchy.items():
+        for parent in parents:
+            children.setdefault(parent, []).append(cls)
+    branch = set(roots)
+    stack = list(roots)
+    while stack:
+        for child in children.get(stack.pop(), ()):
+            if child not in branch:
+                branch.add(child)
+                stack.append(child)
+
+    module = _module_triples(onto, branch)
+    module_world = World()
+    module_onto = module_world.get_ontology(onto.base_iri).load(
+        fileobj=io.BytesIO(module.serialize(format="nt", encoding="utf-8")), format="ntriples")
+    sync_reasoner(module_world)
+
+    result = asserted_hierarchy(onto)
+    by_iri = {cls.iri: cls for cls in result}
+    for module_cls in module_onto.classes():
+        cls = by_iri.get(module_cls.iri)
+        if cls in branch:
+            result[cls] = [onto.world[p.iri] for p in _named(module_cls.is_a) if onto.world[p.iri] is not None]
+    module_world.close()
+    return result
+
+
+def reasoned_hierarchy(onto):
+    """Classify ``onto`` with the external reasoner (HermiT) and read back its hierarchy."""
+    from owlready2 import sync_reasoner
+
+    # Without an argument owlready2 classifies default_world, not the World onto lives in
+    with onto:
+        sync_reasoner(onto.world)
+    return asserted_hierarchy(onto)
+
+
+def hierarchy_cache_key(source_path, mode, roots=()):
+    import hashlib
+    import owlready2
+    from owl_common.ontology_cache import file_digest
+
+    key = hashlib.sha256(f"{HIERARCHY_FORMAT}|{owlready2.VERSION}|{mode}|{file_digest(source_path)}".encode())
+    if mode == "module":
+        key.update("|".join(sorted(cls.iri for cls in roots)).encode())
+    return key.hexdigest()
+
+
+def class_hierarchy(onto, source_path, mode="full", roots=(), cache_dir=None):
+    """{class: [named direct parents]} of ``onto`` under reasoning ``mode``.
+
+    ``none`` uses the asserted is_a, ``closure`` adds the named parts of
+    equivalent-class definitions, ``module`` classifies only the module
+    around ``roots`` and ``full`` the whole ontology.  With ``cache_dir`` the inferred hierarchy is stored as
+    JSON keyed by the content hash of ``source_path``, so a repeated run
+    against the same file does not reason again.
+    """
+    if mode not in REASONING_MODES:
+        raise ValueError(f"Unknown reasoning mode '{mode}', expected one of {REASONING_MODES}")
+    if mode == "none":
+        return asserted_hierarchy(onto)
+
+    cache_path = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, f"hierarchy-{mode}-{hierarchy_cache_key(source_path, mode, roots)}.json")
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            hierarchy = {}
+            for cls in onto.classes():
+                parents = (onto.world[iri] for iri in cached.get(cls.iri, ()))
+                hierarchy[cls] = [p for p in parents if p is not None]
+            print(f"Loaded {mode} class hierarchy from cache: {cache_path}")
+            return hierarchy
+
+    if mode == "closure":
+        hierarchy = closure_hierarchy(onto)
+    elif mode == "module":
+        hierarchy = module_hierarchy(onto, roots)
+    else:
+        hierarchy = reasoned_hierarchy(onto)
+
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({cls.iri: [p.iri for p in parents] for cls, parents in hierarchy.items()}, f, indent=1)
+        os.replace(tmp_path, cache_path)
+        print(f"Cached {mode} class hierarchy: {cache_path}")
+    return hierarchy
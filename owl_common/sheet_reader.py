@@ -0,0 +1,98 @@
+import csv
+import re
+
+NEWLINES = re.compile(r"[\r\n]+")
+
+
+def clean_cell(value):
+    # Excel cell -> single-line string ("" for empty cells)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = str(value)
+    return NEWLINES.sub(" ", value)
+
+
+def _header_names(header_cells):
+    names = []
+    for i, cell in enumerate(header_cells):
+        name = clean_cell(cell).strip()
+        names.append(name if name else f"Unnamed: {i}")
+    return names
+
+
+def iter_excel_rows(excel_path, sheet_name=None, debug_txt=None):
+    """Stream rows of an xlsx sheet as dicts of cleaned strings.
+
+    The workbook is opened in read-only mode so rows are parsed one at a time;
+    if ``debug_txt`` is given, the cleaned rows are also written there as a
+    UTF-8 tab-separated file.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    txt_file = open(debug_txt, "w", newline="", encoding="utf-8") if debug_txt else None
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        rows = ws.iter_rows(values_only=True)
+        header = _header_names(next(rows, ()))
+        width = len(header)
+
+        writer = None
+        if txt_file:
+            writer = csv.writer(txt_file, delimiter="\t")
+            writer.writerow(header)
+
+        for values in rows:
+            cells = [clean_cell(v) for v in values[:width]]
+            if not any(cells):
+                continue
+            cells.extend([""] * (width - len(cells)))
+            if writer:
+                writer.writerow(cells)
+            yield dict(zip(header, cells))
+    finally:
+        if txt_file:
+            txt_file.close()
+            print(f"Saved cleaned UTF-8 TXT to: {debug_txt}")
+        wb.close()
+
+
+def iter_txt_rows(txt_path):
+    # Rows of a UTF-8 tab-separated file (e.g. a previously saved debug TXT)
+    with open(txt_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter="\t")
+        header = [name.strip() for name in next(reader, [])]
+        width = len(header)
+        for values in reader:
+            cells = [clean_cell(v) for v in values[:width]]
+            if not any(cells):
+                continue
+            cells.extend([""] * (width - len(cells)))
+            yield dict(zip(header, cells))
+
+
+def sheet_libraries(path):
+    # Libraries iter_sheet_rows loads for this file
+    return ("openpyxl",) if path.lower().endswith((".xlsx", ".xlsm")) else ()
+
+
+def iter_sheet_rows(path, sheet_name=None, debug_txt=None):
+    # Dispatch on extension: xlsx workbooks are streamed, anything else is read as TSV
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        return iter_excel_rows(path, sheet_name=sheet_name, debug_txt=debug_txt)
+    return iter_txt_rows(path)
+
+
+def iter_row_chunks(rows, chunksize=50000):
+    # Group streamed row dicts into DataFrames of at most `chunksize` rows
+    import pandas as pd
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunksize:
+            yield pd.DataFrame.from_records(batch).fillna("")
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch).fillna("")
@@ -0,0 +1,176 @@
+import json
+
+PROPERTY_TYPES = ("object property", "data property")
+RELATION_COLUMNS = ("name", "property", "domain", "range")
+
+
+def normalize_label(label):
+    # Case- and whitespace-insensitive lookup key
+    return " ".join(str(label).split()).casefold()
+
+
+def _normalize_labels(series):
+    # normalize_label over a whole column
+    return series.astype(str).str.split().str.join(" ").str.casefold()
+
+
+class SheetValidationError(ValueError):
+    """A sheet failed pre-flight validation; ``report`` holds every problem found."""
+
+    def __init__(self, report):
+        self.report = report
+        super().__init__(report.summary())
+
+
+class ValidationReport:
+    """Problems found in one input sheet, grouped by check.
+
+    Each issue is ``{"check", "severity", "message", "rows", "values"}``.
+    ``rows`` are 1-based positions among the sheet's non-empty data rows
+    (the header and blank rows are not counted).  Only "error" issues stop a
+    build; warnings are printed and ignored.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.issues = []
+        self.row_count = 0
+
+    def add(self, check, message, rows=None, values=None, severity="error"):
+        self.issues.append({"check": check, "severity": severity, "message": message,
+                            "rows": [int(row) for row in rows] if rows is not None else None,
+                            "values": values})
+
+    @property
+    def errors(self):
+        return [issue for issue in self.issues if issue["severity"] == "error"]
+
+    def summary(self, limit=20):
+        lines = [f"{self.sheet}: {len(self.errors)} errors, {len(self.issues) - len(self.errors)} warnings "
+                 f"in {self.row_count} rows"]
+        for issue in self.issues[:limit]:
+            rows = issue["rows"]
+            where = f" (rows {', '.join(map(str, rows[:10]))}{', ...' if len(rows) > 10 else ''})" if rows else ""
+            values = issue["values"] if issue["check"] != "parent_cycle" else None
+            shown = f": {', '.join(map(repr, values[:5]))}{', ...' if len(values) > 5 else ''}" if values else ""
+            lines.append(f"  {issue['severity']} [{issue['check']}] {issue['message']}{shown}{where}")
+        if len(self.issues) > limit:
+            lines.append(f"  ... {len(self.issues) - limit} more")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {"sheet": self.sheet, "rows": self.row_count, "errors": len(self.errors), "issues": self.issues}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def raise_for_errors(self):
+        if self.errors:
+            raise SheetValidationError(self)
+
+
+def cyclic_edges(children, parents):
+    """Mask of the (child, parent) edges that lie on or between parent cycles.
+
+    Edges whose parent has no parents left or whose child has no children
+    left cannot be on a cycle; they are peeled off the whole edge list at
+    once until nothing changes, so the work is a few array passes per level
+    of the hierarchy.
+    """
+    import numpy as np
+
+    size = int(max(children.max(initial=-1), parents.max(initial=-1))) + 1
+    alive = np.ones(len(children), dtype=bool)
+    while alive.any():
+        parent_count = np.bincount(children[alive], minlength=size)
+        child_count = np.bincount(parents[alive], minlength=size)
+        removable = alive & ((parent_count[parents] == 0) | (child_count[children] == 0))
+        if not removable.any():
+            break
+        alive &= ~removable
+    return alive
+
+
+def validate_class_tables(tables, sheet="class sheet"):
+    # Label collisions and parent cycles of an extracted level_N sheet
+    import numpy as np
+
+    report = ValidationReport(sheet)
+    report.row_count = tables.row_count
+
+    # Cell texts that differ beyond case and spacing but formalize to one class
+    for label, variants in tables.variants.items():
+        distinct = {}
+        for raw, row in variants.items():
+            distinct.setdefault(normalize_label(raw), (raw, row))
+        if len(distinct) > 1:
+            texts = sorted(raw for raw, _ in distinct.values())
+            report.add("label_collision", f"different cell texts become class '{label}'",
+                       rows=sorted(row for _, row in distinct.values()), values=texts)
+
+    # Cycles in the derived (child, parent) edge list
+    edges = [(class_id, parent_id) for class_id, parent_id in tables.edges() if parent_id is not None]
+    if edges:
+        position = {class_id: i for i, class_id in enumerate(tables.labels)}
+        children, parents = np.array([(position[c], position[p]) for c, p in edges], dtype=np.int64).reshape(-1, 2).T
+        on_cycle = cyclic_edges(children, parents)
+        if on_cycle.any():
+            cycle_edges = [edge for edge, alive in zip(edges, on_cycle) if alive]
+            labels = sorted({tables.labels[class_id] for edge in cycle_edges for class_id in edge})
+            report.add("parent_cycle", f"cyclic parent chain among {labels}",
+                       rows=sorted({tables.edge_rows[edge] for edge in cycle_edges}),
+                       values=[[tables.labels[c], tables.labels[p]] for c, p in cycle_edges])
+    return report
+
+
+def validate_relation_rows(rows, class_labels, object_labels=(), data_labels=(), sheet="relation sheet"):
+    """Check name/property/domain/range rows against the labels they refer to.
+
+    ``rows`` are dicts with normalized column names; the label arguments are
+    iterables of labels (or of normalize_label keys) of the classes, object
+    properties and data properties the rows may use.  Every check runs on
+    whole columns at once.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(list(rows)).fillna("")
+    report = ValidationReport(sheet)
+    report.row_count = len(frame)
+    missing = [column for column in RELATION_COLUMNS if column not in frame]
+    if missing:
+        report.add("missing_column", f"missing columns {missing}, found {list(frame.columns)}")
+        return report
+    if frame.empty:
+        return report
+
+    row_numbers = pd.Series(range(1, len(frame) + 1), index=frame.index)
+    name = frame["name"].astype(str).str.strip()
+    kind = frame["property"].astype(str).str.strip().str.lower()
+    classes = {normalize_label(label) for label in class_labels}
+    properties = {normalize_label(label) for label in object_labels} | {normalize_label(label) for label in data_labels}
+
+    def add_rows(check, mask, message, values):
+        if mask.any():
+            report.add(check, message, rows=row_numbers[mask], values=sorted(set(values[mask])))
+
+    add_rows("empty_name", name == "", "rows without a property name", name)
+    add_rows("unknown_property_type", ~kind.isin(PROPERTY_TYPES),
+             f"property type is not one of {list(PROPERTY_TYPES)}", frame["property"].astype(str))
+
+    # domain (and range of object properties) must name an existing class
+    checked = [("domain", kind.isin(PROPERTY_TYPES)), ("range", kind == "object property")]
+    for column, applies in checked:
+        keys = _normalize_labels(frame[column])
+        unknown = applies & ~keys.isin(classes)
+        is_property = unknown & keys.isin(properties)
+        add_rows(f"{column}_not_a_class", is_property, f"{column} names a property, not a class", frame[column])
+        add_rows(f"unknown_{column}", unknown & ~is_property, f"{column} label has no class", frame[column])
+
+    # one name used as both an object and a data property
+    keys = _normalize_labels(name)
+    typed = kind.isin(PROPERTY_TYPES)
+    kinds_per_name = kind[typed].groupby(keys[typed]).nunique()
+    clashing = keys.isin(kinds_per_name.index[kinds_per_name > 1]) & typed
+    add_rows("property_type_clash", clashing, "name used for both an object and a data property", name)
+    return report
@@ -0,0 +1,134 @@
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL = "http://www.w3.org/2002/07/owl#"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+
+STANDARD_PREFIXES = {"rdf": RDF, "xsd": XSD, "rdfs": RDFS, "owl": OWL}
+
+FORMATS = ("rdfxml", "turtle", "ntriples")
+
+
+def ontology_base_iri(ontology_uri):
+    # Same rule as owlready2.get_ontology(): entity IRIs are base_iri + name
+    return ontology_uri if ontology_uri.endswith(("#", "/")) else ontology_uri + "#"
+
+
+# Same output as xml.sax.saxutils.escape/quoteattr, which would import
+# urllib.request (tens of ms) into every tool's startup
+def escape(text):
+    return text.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+
+
+def quoteattr(text):
+    text = escape(text).replace("\n", "&#10;").replace("\r", "&#13;").replace("\t", "&#9;")
+    if '"' not in text:
+        return f'"{text}"'
+    if "'" not in text:
+        return f"'{text}'"
+    return '"%s"' % text.replace('"', "&quot;")
+
+
+def _nt_escape(text):
+    return (text.replace("\\", "\\\\").replace('"', '\\"')
+                .replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t"))
+
+
+class TripleWriter:
+    """Streaming RDF writer for subject-grouped statements.
+
+    Each ``write`` call emits one subject block: ``statements`` is a list of
+    ``(predicate_iri, value, is_resource)``; literal values are written as
+    xsd:string, the datatype owlready2 uses for Python strings.  Nothing is
+    buffered beyond the current subject, so memory stays flat however many
+    subjects are written.
+    """
+
+    def __init__(self, fileobj, fmt, base_iri, prefixes=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown RDF format '{fmt}', expected one of {FORMATS}")
+        self.f = fileobj
+        self.fmt = fmt
+        self.base_iri = base_iri
+        self.prefixes = dict(STANDARD_PREFIXES)
+        self.prefixes.update(prefixes or {})
+        self.count = 0
+
+    # --- term helpers -------------------------------------------------------
+
+    def _qname(self, iri):
+        # RDF/XML and Turtle need declared namespaces for predicates and types
+        for prefix, ns in self.prefixes.items():
+            if iri.startswith(ns) and iri[len(ns):].replace("_", "a").isalnum():
+                return f"{prefix}:{iri[len(ns):]}"
+        if iri.startswith(self.base_iri) and iri[len(self.base_iri):].replace("_", "a").isalnum():
+            return iri[len(self.base_iri):]
+        return None
+
+    def _xml_ref(self, iri):
+        if self.base_iri.endswith("#") and iri.startswith(self.base_iri):
+            return "#" + iri[len(self.base_iri):]
+        return iri
+
+    def _turtle_term(self, iri):
+        qname = self._qname(iri)
+        if qname is None:
+            return f"<{iri}>"
+        return qname if ":" in qname else f":{qname}"
+
+    # --- document -----------------------------------------------------------
+
+    def begin(self):
+        if self.fmt == "rdfxml":
+            self.f.write('<?xml version="1.0"?>\n')
+            self.f.write(f'<rdf:RDF xmlns:rdf="{RDF}"')
+            for prefix, ns in self.prefixes.items():
+                if prefix != "rdf":
+                    self.f.write(f'\n         xmlns:{prefix}="{ns}"')
+            self.f.write(f'\n         xml:base="{self.base_iri[:-1]}"')
+            self.f.write(f'\n         xmlns="{self.base_iri}">\n\n')
+        elif self.fmt == "turtle":
+            self.f.write(f"@prefix : <{self.base_iri}> .\n")
+            for prefix, ns in self.prefixes.items():
+                self.f.write(f"@prefix {prefix}: <{ns}> .\n")
+            self.f.write("\n")
+
+    def write(self, subject, rdf_type, statements=()):
+        if self.fmt == "ntriples":
+            lines = [f"<{subject}> <{RDF}type> <{rdf_type}> .\n"]
+            for predicate, value, is_resource in statements:
+                obj = f"<{value}>" if is_resource else f'"{_nt_escape(value)}"^^<{XSD}string>'
+                lines.append(f"<{subject}> <{predicate}> {obj} .\n")
+            self.f.write("".join(lines))
+
+        elif self.fmt == "turtle":
+            parts = [f"{self._turtle_term(subject)} a {self._turtle_term(rdf_type)}"]
+            for predicate, value, is_resource in statements:
+                obj = self._turtle_term(value) if is_resource else f'"{_nt_escape(value)}"^^xsd:string'
+                parts.append(f"{self._turtle_term(predicate)} {obj}")
+            self.f.write(" ;\n    ".join(parts) + " .\n\n")
+
+        else:
+            element = self._qname(rdf_type)
+            if element is None:
+                raise ValueError(f"No namespace prefix declared for type {rdf_type}")
+            about = quoteattr(self._xml_ref(subject))
+            if not statements:
+                self.f.write(f"<{element} rdf:about={about}/>\n\n")
+            else:
+                lines = [f"<{element} rdf:about={about}>\n"]
+                for predicate, value, is_resource in statements:
+                    tag = self._qname(predicate)
+                    if tag is None:
+                        raise ValueError(f"No namespace prefix declared for predicate {predicate}")
+                    if is_resource:
+                        lines.append(f"  <{tag} rdf:resource={quoteattr(self._xml_ref(value))}/>\n")
+                    else:
+                        lines.append(f'  <{tag} rdf:datatype="{XSD}string">{escape(value)}</{tag}>\n')
+                lines.append(f"</{element}>\n\n")
+                self.f.write("".join(lines))
+        self.count += 1
+
+    def end(self):
+        if self.fmt == "rdfxml":
+            self.f.write("\n</rdf:RDF>\n")
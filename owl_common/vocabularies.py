@@ -0,0 +1,33 @@
+import os
+
+VOCABULARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vocabularies")
+
+SKOS_IRI = "http://www.w3.org/2004/02/skos/core"
+
+# Ontology IRI -> bundled file in VOCABULARY_DIR
+CATALOG = {
+    SKOS_IRI: "skos-core.rdf",
+}
+
+
+def register_local_vocabularies():
+    # Route the catalog IRIs to the bundled files; owlready2 consults
+    # PREDEFINED_ONTOLOGIES for every load, including owl:imports, so nothing
+    # in the catalog is ever downloaded.
+    from owlready2.namespace import PREDEFINED_ONTOLOGIES
+
+    for iri, filename in CATALOG.items():
+        path = os.path.join(VOCABULARY_DIR, filename)
+        PREDEFINED_ONTOLOGIES[iri] = path
+        PREDEFINED_ONTOLOGIES[iri + "#"] = path
+
+
+def load_vocabulary(iri, world=None):
+    from owlready2 import default_world
+
+    register_local_vocabularies()
+    return (world or default_world).get_ontology(iri).load()
+
+
+def load_skos(world=None):
+    return load_vocabulary(SKOS_IRI, world)
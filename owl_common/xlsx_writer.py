@@ -0,0 +1,224 @@
+import csv
+import os
+
+EXCEL_MAX_ROWS = 1048576  # rows per worksheet, header included
+
+
+class StreamingSheetWriter:
+    """Write rows straight into an xlsx workbook opened in write-only mode.
+
+    Rows are flushed to disk as they arrive, so memory does not grow with the
+    number of rows.  When a worksheet reaches ``max_rows`` a new one
+    (Sheet2, Sheet3, ...) is started with the header repeated.  ``tsv_path``
+    additionally mirrors every row into a UTF-8 tab-separated file.  Used
+    as a context manager, an exception saves nothing and removes the mirror,
+    so a failed export never leaves a truncated file behind.
+    """
+
+    def __init__(self, path, header, max_rows=EXCEL_MAX_ROWS, tsv_path=None):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.header = list(header)
+        self.max_rows = max_rows
+        self.workbook = Workbook(write_only=True)
+        self.sheets = 0
+        self.rows = 0
+        self._sheet_rows = 0
+        self._closed = False
+        self._new_sheet()
+
+        self._tsv_file = open(tsv_path, "w", newline="", encoding="utf-8") if tsv_path else None
+        self._tsv = csv.writer(self._tsv_file, delimiter="\t") if tsv_path else None
+        if self._tsv:
+            self._tsv.writerow(self.header)
+
+    def _new_sheet(self):
+        self.sheets += 1
+        self.sheet = self.workbook.create_sheet(f"Sheet{self.sheets}")
+        self.sheet.append(self.header)
+        self._sheet_rows = 1
+
+    def writerow(self, row):
+        if self._sheet_rows >= self.max_rows:
+            self._new_sheet()
+        # empty strings become empty cells, everything else is written as text
+        self.sheet.append([str(value) if value != "" and value is not None else None for value in row])
+        self._sheet_rows += 1
+        self.rows += 1
+        if self._tsv:
+            self._tsv.writerow(row)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.workbook.save(self.path)
+        if self._tsv_file:
+            self._tsv_file.close()
+
+    def abort(self):
+        # Drop the export: the workbook is never saved and the mirror is removed
+        if self._closed:
+            return
+        self._closed = True
+        for sheet in self.workbook.worksheets:
+            # A write-only sheet streams its rows into a temporary XML file
+            # that openpyxl only deletes at interpreter exit; for a large
+            # export that is as big as the output, so remove it now.  The
+            # writer is openpyxl internals: if it is missing, exit cleanup
+            # still removes the file.
+            sheet.close()
+            stream = getattr(sheet, "_writer", None)
+            if stream is not None and hasattr(stream, "cleanup"):
+                stream.cleanup()
+        if self._tsv_file:
+            self._tsv_file.close()
+            os.remove(self._tsv_file.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+class DelimitedWriter:
+    """CSV / tab-separated counterpart of StreamingSheetWriter (UTF-8, one file, no row limit).
+
+    As a context manager, an exception removes the partial file.
+    """
+
+    def __init__(self, path, header, delimiter=",", tsv_path=None):
+        self.path = path
+        self.header = list(header)
+        self.sheets = 1
+        self.rows = 0
+        self._closed = False
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self._writer.writerow(self.header)
+        self._mirror = DelimitedWriter(tsv_path, header, "\t") if tsv_path else None
+
+    def writerow(self, row):
+        self._writer.writerow(row)
+        self.rows += 1
+        if self._mirror:
+            self._mirror.writerow(row)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._file.close()
+        if self._mirror:
+            self._mirror.close()
+
+    def abort(self):
+        # Drop the export: the partial file and its mirror are removed
+        if self._closed:
+            return
+        self._closed = True
+        self._file.close()
+        os.remove(self.path)
+        if self._mirror:
+            self._mirror.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+class ParquetWriter:
+    """Parquet counterpart of StreamingSheetWriter; every column is a string.
+
+    Rows are buffered and written as one row group per ``batch_size`` rows,
+    so memory stays bounded.  Empty cells become nulls, as they do in the
+    workbook.  Needs pyarrow.
+    """
+
+    def __init__(self, path, header, batch_size=65536, tsv_path=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from None
+
+        self.path = path
+        self.header = list(header)
+        self.sheets = 1
+        self.rows = 0
+        self.batch_size = batch_size
+        self._closed = False
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string()) for name in self.header])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._columns = [[] for _ in self.header]
+        self._mirror = DelimitedWriter(tsv_path, header, "\t") if tsv_path else None
+
+    def writerow(self, row):
+        for column, value in zip(self._columns, row):
+            column.append(str(value) if value != "" and value is not None else None)
+        self.rows += 1
+        if len(self._columns[0]) >= self.batch_size:
+            self._flush()
+        if self._mirror:
+            self._mirror.writerow(row)
+
+    def _flush(self):
+        if self._columns[0]:
+            self._writer.write_table(self._pa.table(self._columns, schema=self._schema))
+            self._columns = [[] for _ in self.header]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._flush()
+        self._writer.close()
+        if self._mirror:
+            self._mirror.close()
+
+    def abort(self):
+        # Drop the export: the partial file and its mirror are removed
+        if self._closed:
+            return
+        self._closed = True
+        self._writer.close()
+        os.remove(self.path)
+        if self._mirror:
+            self._mirror.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type:
+            self.abort()
+        else:
+            self.close()
+
+
+# Output file extension -> table format
+TABLE_FORMATS = {".xlsx": "xlsx", ".csv": "csv", ".tsv": "tsv", ".txt": "tsv", ".parquet": "parquet"}
+
+
+def open_table_writer(path, header, tsv_path=None):
+    # Streaming writer for the format given by path's extension (xlsx, csv, tsv/txt, parquet)
+    ext = os.path.splitext(path)[1].lower()
+    fmt = TABLE_FORMATS.get(ext)
+    if fmt == "xlsx":
+        return StreamingSheetWriter(path, header, tsv_path=tsv_path)
+    if fmt in ("csv", "tsv"):
+        return DelimitedWriter(path, header, "," if fmt == "csv" else "\t", tsv_path=tsv_path)
+    if fmt == "parquet":
+        return ParquetWriter(path, header, tsv_path=tsv_path)
+    raise ValueError(f"Unknown output format '{ext}' of {path}, expected one of {tuple(TABLE_FORMATS)}")
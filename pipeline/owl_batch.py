@@ -0,0 +1,245 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import configure
+
+# Tool name -> extension of the output it writes
+TOOLS = {
+    "excel2owl_classes": ".owl",
+    "owl2excel_classes": ".xlsx",
+    "owl2excel_properties": ".xlsx",
+}
+
+_worker = {}
+
+
+def load_manifest(path):
+    """Read a batch manifest: a JSON list of items, paths relative to the manifest.
+
+    Every item has ``tool`` (one of TOOLS) and ``input``; ``output`` defaults
+    to the input with the tool's extension.  excel2owl_classes items also need
+    ``uri`` and take ``engine``, ``format``, ``serialize_workers``,
+    ``registry``, ``incremental`` and ``validate``; the owl2excel items take
+    ``txt`` and ``cache_dir``, classes also ``dedupe_subtrees`` and
+    properties ``engine``.
+    """
+    with open(path, encoding="utf-8") as f:
+        items = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    for item in items:
+        for key in ("input", "output", "registry", "txt", "cache_dir"):
+            if item.get(key) and not os.path.isabs(item[key]):
+                item[key] = os.path.join(base_dir, item[key])
+    return items
+
+
+def glob_items(pattern, tool, output_dir=None, uri=None, fmt=None):
+    # One item per matching file; "{stem}" in uri becomes the file name without extension
+    from owl_common.ontology_writer import RDF_EXTENSIONS
+
+    items = []
+    for path in sorted(glob.glob(pattern)):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        item = {"tool": tool, "input": path}
+        if output_dir:
+            item["output"] = os.path.join(output_dir, stem + (RDF_EXTENSIONS[fmt] if fmt else TOOLS[tool]))
+        if uri:
+            item["uri"] = uri.format(stem=stem)
+        if fmt:
+            item["format"] = fmt
+        items.append(item)
+    return items
+
+
+def check_items(items):
+    # Fill in names and default outputs; raises ValueError on the first bad item
+    from owl_common.ontology_writer import RDF_EXTENSIONS
+
+    for index, item in enumerate(items, 1):
+        if item.get("tool") not in TOOLS:
+            raise ValueError(f"Item {index}: unknown tool '{item.get('tool')}', expected one of {tuple(TOOLS)}")
+        if not item.get("input"):
+            raise ValueError(f"Item {index}: missing 'input'")
+        if item["tool"] == "excel2owl_classes" and not item.get("uri"):
+            raise ValueError(f"Item {index}: excel2owl_classes needs 'uri'")
+        stem = os.path.splitext(item["input"])[0]
+        extension = RDF_EXTENSIONS[item["format"]] if item.get("format") else TOOLS[item["tool"]]
+        item.setdefault("output", stem + extension)
+        item.setdefault("name", os.path.basename(stem))
+    outputs = [item["output"] for item in items]
+    duplicates = sorted({path for path in outputs if outputs.count(path) > 1})
+    if duplicates:
+        raise ValueError(f"Several items write the same output: {duplicates}")
+    return items
+
+
+def _init_worker(log_dir=None):
+    # Paid once per worker process instead of once per item: the pandas /
+    # owlready2 / openpyxl imports and registering the bundled vocabularies'
+    # file paths.  The tools import these lazily, so they are loaded here
+    # explicitly.  SKOS itself is still parsed into each item's fresh World:
+    # it is small, and restoring a snapshot of it costs as much, since
+    # owlready2 rebuilds its property objects either way.
+    import importlib
+
+    for module in ("openpyxl", "owlready2", "pandas"):
+        importlib.import_module(module)
+    from excel2owl.excel2owl_class_annotations import build_ontology_with_standard_annotations
+    from owl2excel.owl2excel_classes_annotations import extract_class_hierarchy_with_annotations
+    from owl2excel.owl2excel_properties import extract_properties_to_excel
+    from owl_common.vocabularies import register_local_vocabularies
+
+    register_local_vocabularies()
+    _worker["log_dir"] = log_dir
+    _worker["run"] = {
+        "excel2owl_classes": lambda item, world: build_ontology_with_standard_annotations(
+            item["input"], item["uri"], item["output"], engine=item.get("engine", "owlready2"),
+            fmt=item.get("format", "rdfxml"), registry_path=item.get("registry"),
+            incremental=item.get("incremental", False), world=world, validate=item.get("validate", True),
+            serialize_workers=item.get("serialize_workers", 1)),
+        "owl2excel_classes": lambda item, world: extract_class_hierarchy_with_annotations(
+            item["input"], item["output"], txt_path=item.get("txt"), cache_dir=item.get("cache_dir"),
+            dedupe_subtrees=item.get("dedupe_subtrees", False), world=world),
+        "owl2excel_properties": lambda item, world: extract_properties_to_excel(
+            item["input"], item["output"], txt_path=item.get("txt"), cache_dir=item.get("cache_dir"), world=world,
+            engine=item.get("engine", "owlready2")),
+    }
+
+
+def run_item(index, item):
+    """Run one item in a fresh owlready2 World; never raises.
+
+    Returns the report entry: status ("ok" or "failed"), error, wall and CPU
+    seconds and the per-phase wall seconds of the item.
+    """
+    from owlready2 import World
+
+    log_path = None
+    if _worker["log_dir"]:
+        log_path = os.path.join(_worker["log_dir"], f"{index:04d}_{item['name']}.log")
+    result = {"index": index, "name": item["name"], "tool": item["tool"], "input": item["input"],
+              "output": item["output"], "status": "ok", "error": None, "log": log_path, "pid": os.getpid()}
+
+    instrumentation = configure(item["tool"])
+    start = (time.perf_counter(), time.process_time())
+    world = World()
+    log = open(log_path, "w", encoding="utf-8") if log_path else None
+    try:
+        with redirect_stdout(log or sys.stdout), redirect_stderr(log or sys.stderr):
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(item["output"])), exist_ok=True)
+                _worker["run"][item["tool"]](item, world)
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+    finally:
+        world.close()
+        if log:
+            log.close()
+    result["wall_seconds"] = round(time.perf_counter() - start[0], 3)
+    result["cpu_seconds"] = round(time.process_time() - start[1], 3)
+    result["phases"] = {name: total["wall_seconds"] for name, total in instrumentation.summary().items()}
+    return result
+
+
+def run_batch(items, workers=1, log_dir=None):
+    """Run every item, fanned out over ``workers`` processes; returns the report entries in item order.
+
+    A failing item is reported and the others go on.  With one worker the
+    items run in this process.
+    """
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    results = [None] * len(items)
+
+    def report(result):
+        results[result["index"] - 1] = result
+        done = sum(r is not None for r in results)
+        print(f"[{done}/{len(items)}] {result['status']:<6} {result['name']} ({result['wall_seconds']:.2f}s)"
+              + (f": {result['error']}" if result["error"] else ""))
+
+    if workers <= 1:
+        _init_worker(log_dir)
+        for index, item in enumerate(items, 1):
+            report(run_item(index, item))
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    import multiprocessing
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(log_dir,)) as pool:
+        jobs = {pool.submit(run_item, index, item): (index, item) for index, item in enumerate(items, 1)}
+        for job in as_completed(jobs):
+            index, item = jobs[job]
+            try:
+                result = job.result()
+            except Exception as e:  # the worker process died (e.g. out of memory)
+                result = {"index": index, "name": item["name"], "tool": item["tool"], "input": item["input"],
+                          "output": item["output"], "status": "failed", "error": f"{type(e).__name__}: {e}",
+                          "log": None, "pid": None, "wall_seconds": 0.0, "cpu_seconds": 0.0, "phases": {}}
+            report(result)
+    return results
+
+
+def print_report(results, wall_seconds):
+    width = max([len(r["name"]) for r in results] + [4])
+    print(f"\n{'item':<{width}}  {'tool':<20}  {'status':<6}  {'wall s':>8}  {'cpu s':>8}")
+    for r in results:
+        print(f"{r['name']:<{width}}  {r['tool']:<20}  {r['status']:<6}  {r['wall_seconds']:>8.2f}  {r['cpu_seconds']:>8.2f}")
+    failed = [r for r in results if r["status"] != "ok"]
+    print(f"{len(results) - len(failed)} succeeded, {len(failed)} failed in {wall_seconds:.2f}s "
+          f"(sum of item times {sum(r['wall_seconds'] for r in results):.2f}s)")
+    for r in failed:
+        print(f"FAILED {r['name']}: {r['error']}" + (f" (see {r['log']})" if r["log"] else ""))
+
+
+if __name__ == "__main__":
+    from owl_common.ontology_writer import RDF_EXTENSIONS
+
+    parser = argparse.ArgumentParser(description="Convert many workbooks/ontologies in one run with a pool of worker processes.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("-m", "--manifest", help="JSON list of items ({tool, input, output, uri, ...}), paths relative to the manifest")
+    source.add_argument("-g", "--glob", help="Run --tool on every file matching this pattern, e.g. 'sheets/*.xlsx'")
+    parser.add_argument("--tool", choices=TOOLS, help="With --glob: the conversion to run")
+    parser.add_argument("-u", "--uri", help="With --glob and excel2owl_classes: ontology URI, '{stem}' is the file name, e.g. https://example.org/{stem}#")
+    parser.add_argument("--output-dir", help="With --glob: directory for the outputs (default: next to each input)")
+    parser.add_argument("--format", choices=RDF_EXTENSIONS, help="With --glob and excel2owl_classes: output RDF syntax (default: rdfxml)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument("--log-dir", help="Optional: write each item's messages to <log-dir>/<n>_<name>.log instead of the console")
+    parser.add_argument("--report", help="Optional: write the per-item report to this JSON file")
+    args = parser.parse_args()
+    if args.glob and not args.tool:
+        parser.error("--glob requires --tool")
+    if args.format and args.tool != "excel2owl_classes":
+        parser.error("--format applies to --tool excel2owl_classes")
+
+    if args.manifest:
+        items = load_manifest(args.manifest)
+    else:
+        items = glob_items(args.glob, args.tool, args.output_dir, args.uri, args.format)
+    try:
+        items = check_items(items)
+    except ValueError as e:
+        parser.error(str(e))
+    if not items:
+        parser.error("No items to run")
+
+    start = time.perf_counter()
+    results = run_batch(items, min(args.workers, len(items)), args.log_dir)
+    wall = time.perf_counter() - start
+    print_report(results, wall)
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"workers": args.workers, "wall_seconds": round(wall, 3), "items": results}, f, indent=2)
+        print(f"Saved report to: {args.report}")
+    sys.exit(1 if any(r["status"] != "ok" for r in results) else 0)
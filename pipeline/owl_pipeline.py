@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import phase, preload, add_instrumentation_arguments, configure_from_args
+
+
+def load_config(path):
+    """Read a pipeline config (JSON) and resolve its paths against the config's directory.
+
+    Keys: ``ontology_uri``, ``class_sheet`` and ``output`` (required);
+    ``relation_sheet``, ``registry``, ``cache_dir``, ``format`` (rdfxml,
+    ntriples or turtle), ``serialize_workers``, ``validate`` (default true)
+    and ``merge`` (optional).  ``merge`` holds ``import_ontology``,
+    ``tasks`` (a task list or the path of a merge task JSON) and optionally
+    ``reasoning``, ``stream_import`` and ``workers``.
+    """
+    from owl_common.reasoning import REASONING_MODES
+    from owl_common.triple_writer import FORMATS
+
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    for key in ("ontology_uri", "class_sheet", "output"):
+        if key not in config:
+            raise ValueError(f"Pipeline config {path} is missing '{key}'")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    resolve = lambda p: p if os.path.isabs(p) else os.path.join(base_dir, p)
+    for key in ("class_sheet", "relation_sheet", "registry", "cache_dir", "output"):
+        if config.get(key):
+            config[key] = resolve(config[key])
+
+    merge = config.get("merge")
+    if merge:
+        merge["import_ontology"] = resolve(merge["import_ontology"])
+        if isinstance(merge["tasks"], str):
+            with open(resolve(merge["tasks"]), encoding="utf-8") as f:
+                merge["tasks"] = json.load(f)
+        if merge.get("reasoning", "full") not in REASONING_MODES:
+            raise ValueError(f"Unknown reasoning mode '{merge['reasoning']}', expected one of {REASONING_MODES}")
+        if merge.get("stream_import") and merge.get("reasoning", "full") != "none":
+            raise ValueError("Streaming the import ontology uses its asserted hierarchy; use reasoning 'none'")
+    if config.get("format", "rdfxml") not in FORMATS:
+        raise ValueError(f"Unknown output format '{config['format']}', expected one of {FORMATS}")
+    return config
+
+
+def run_pipeline(config):
+    """Build classes, add properties and merge branches in one owlready2 world.
+
+    Every stage works on the same in-memory ontology, so nothing is saved or
+    reparsed between stages; the result is serialized once, to
+    ``config["output"]``.  The per-task ``output_file`` of the merge tasks is
+    not written.  New property and class IRIs use the ontology's own
+    namespace.  Both sheets are validated before the ontology is created;
+    a bad sheet raises SheetValidationError.  Returns the output path.
+    """
+    from owl_common.vocabularies import register_local_vocabularies
+    from owl_common.label_registry import LabelRegistry
+    from owl_common.ontology_writer import save_ontology
+    from owl_common.sheet_validation import validate_relation_rows
+    from excel2owl.excel2owl_class_annotations import read_class_tables, build_class_ontology
+    from excel2owl.excel2owl_properties import add_properties, property_allocator, read_relation_rows
+    from selective_owl_merging.selective_owl_merging import merge_branches, load_import_ontology, base_allocator
+
+    register_local_vocabularies()
+    validate = config.get("validate", True)
+
+    registry = LabelRegistry(config["registry"]) if config.get("registry") else None
+    try:
+        tables = read_class_tables(config["class_sheet"], registry, validate)
+        relation_rows = read_relation_rows(config["relation_sheet"]) if config.get("relation_sheet") else None
+        if relation_rows is not None and validate:
+            # The relations may only refer to classes of the class sheet
+            with phase("validate", items=len(relation_rows)):
+                report = validate_relation_rows(relation_rows, tables.labels.values())
+            if report.issues:
+                print(report.summary())
+            report.raise_for_errors()
+        onto = build_class_ontology(tables, config["ontology_uri"])
+        if registry:
+            registry.save({class_id: tables.digest(class_id) for class_id in tables.labels})
+    finally:
+        if registry:
+            registry.close()
+
+    # Nothing is on disk yet, so the IRI counters come from scanning the
+    # ontology; the merge counters start after the properties just added
+    if relation_rows is not None:
+        add_properties(onto, relation_rows, property_allocator(onto), validate=False)
+    allocator = base_allocator(onto, onto.base_iri, cache_dir=config.get("cache_dir"))
+
+    merge = config.get("merge")
+    if merge:
+        with phase("read"):
+            onto_import = load_import_ontology(merge["import_ontology"], merge["tasks"], onto.world,
+                                               stream_import=merge.get("stream_import", False))
+        merge_branches(onto, onto_import, merge["import_ontology"], merge["tasks"], onto.base_iri, allocator,
+                       reasoning=merge.get("reasoning", "full"), cache_dir=config.get("cache_dir"),
+                       workers=merge.get("workers", 1))
+
+    output = config["output"]
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with phase("serialize"):
+        save_ontology(onto, output, config.get("format", "rdfxml"), config.get("serialize_workers", 1))
+    print(f"Ontology saved to: {output}")
+    allocator.record(output)
+    return output
+
+
+if __name__ == "__main__":
+    from owl_common.triple_writer import FORMATS
+
+    parser = argparse.ArgumentParser(description="Run class sheet -> relation sheet -> branch merge in one process, saving only the final ontology.")
+    parser.add_argument("-c", "--config", required=True, help="Pipeline config JSON (paths relative to the config file)")
+    parser.add_argument("-o", "--output", help="Optional: override the config's output path")
+    parser.add_argument("--format", choices=FORMATS, help="Optional: override the config's output syntax; end the output path in .gz to compress it")
+    parser.add_argument("--serialize-workers", type=int, help="Optional: render ntriples/turtle output in this many processes")
+    parser.add_argument("--no-validate", action="store_true", help="Skip the pre-flight check of the class and relation sheets")
+    parser.add_argument("--validation-report", help="Optional: write the pre-flight check's problems to this JSON file")
+    add_instrumentation_arguments(parser)
+
+    args = parser.parse_args()
+    from owl_common.sheet_reader import sheet_libraries
+    from owl_common.sheet_validation import SheetValidationError
+
+    instrumentation = configure_from_args("owl_pipeline", args)
+
+    config = load_config(args.config)
+    if args.output:
+        config["output"] = os.path.abspath(args.output)
+    if args.format:
+        config["format"] = args.format
+    if args.serialize_workers:
+        config["serialize_workers"] = args.serialize_workers
+    if args.no_validate:
+        config["validate"] = False
+    preload(*sheet_libraries(config["class_sheet"]), *sheet_libraries(config.get("relation_sheet") or ""),
+            "numpy", "pandas", "owlready2")
+    try:
+        run_pipeline(config)
+    except SheetValidationError as e:
+        if args.validation_report:
+            e.report.save(args.validation_report)
+            print(f"Saved validation report to: {args.validation_report}")
+        instrumentation.close()
+        sys.exit(f"Aborted: {e.report.sheet} failed validation")
+    instrumentation.close()
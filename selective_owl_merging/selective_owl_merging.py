@@ -1,64 +1,69 @@
-from owlready2 import *
-from collections import deque
-import re
-from owlready2 import AnnotationProperty, rdfs
+import os
+import sys
+import types
+from collections import defaultdict, deque
 import json
 import argparse
 
-def get_all_subclasses(cls):
-    subclasses = set(cls.subclasses())
-    for sub in cls.subclasses():
-        subclasses.update(get_all_subclasses(sub))
-    return subclasses
-
-def topological_sort(classes):
-    graph = {cls: set(cls.is_a) for cls in classes}
-    in_degree = {cls: 0 for cls in classes}
-
-    for cls, parents in graph.items():
-        for parent in parents:
-            if parent in in_degree:
-                in_degree[cls] += 1
-
-    queue = deque([cls for cls, deg in in_degree.items() if deg == 0])
-    ordered = []
-
-    while queue:
-        cls = queue.popleft()
-        ordered.append(cls)
-        for child in classes:
-            if cls in graph.get(child, set()):
-                in_degree[child] -= 1
-                if in_degree[child] == 0:
-                    queue.append(child)
-    return ordered
-
-def get_existing_max_id(onto, base_iri):
-    max_id = -1
-    for cls in onto.classes():
-        if cls.iri.startswith(base_iri):
-            suffix = cls.iri.split("#")[-1]
-            if suffix.isdigit():
-                max_id = max(max_id, int(suffix))
-    return max_id
-
-def get_existing_max_objprop_id(onto, base_iri):
-    max_id = -1
-    for prop in onto.object_properties():
-        if prop.iri.startswith(base_iri):
-            suffix = prop.iri.split("#")[-1]
-            if suffix.startswith("R") and suffix[1:].isdigit():
-                max_id = max(max_id, int(suffix[1:]))
-    return max_id
-
-def get_existing_max_dataprop_id(onto, base_iri):
-    max_id = -1
-    for prop in onto.data_properties():
-        if prop.iri.startswith(base_iri):
-            suffix = prop.iri.split("#")[-1]
-            if suffix.startswith("D") and suffix[1:].isdigit():
-                max_id = max(max_id, int(suffix[1:]))
-    return max_id
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from owl_common.instrumentation import phase, log, preload, add_instrumentation_arguments, configure_from_args
+
+class SubclassIndex:
+    """Named subclass edges of one ontology, indexed once for all merge tasks.
+
+    Built from a {class: [parents]} hierarchy (see owl_common.reasoning).
+    Adjacency lists are ordered by IRI, so branches resolve identically on
+    every run.  Branch closures are memoized per task root; a branch that
+    contains an earlier root reuses its descendants instead of walking them
+    again.
+    """
+
+    def __init__(self, hierarchy):
+        self.parents = {}
+        self.children = defaultdict(list)
+        for cls in sorted(hierarchy, key=lambda c: c.iri):
+            parents = hierarchy[cls]
+            self.parents[cls] = parents
+            for parent in parents:
+                self.children[parent].append(cls)
+        self._closures = {}
+
+    def get_all_subclasses(self, cls):
+        closure = self._closures.get(cls)
+        if closure is not None:
+            return closure
+        closure = set()
+        stack = [cls]
+        while stack:
+            for child in self.children.get(stack.pop(), ()):
+                if child in closure:
+                    continue
+                closure.add(child)
+                known = self._closures.get(child)
+                if known is not None:
+                    closure |= known
+                else:
+                    stack.append(child)
+        closure = self._closures[cls] = frozenset(closure)
+        return closure
+
+    def topological_sort(self, classes):
+        # Kahn's algorithm over the index: O(V + E) for the given classes
+        in_degree = {cls: sum(1 for p in self.parents.get(cls, ()) if p in classes) for cls in classes}
+        queue = deque(sorted((cls for cls, deg in in_degree.items() if deg == 0), key=lambda c: c.iri))
+        ordered = []
+
+        while queue:
+            cls = queue.popleft()
+            ordered.append(cls)
+            for child in self.children.get(cls, ()):
+                if child in in_degree:
+                    in_degree[child] -= 1
+                    if in_degree[child] == 0:
+                        queue.append(child)
+        if len(ordered) < len(in_degree):
+            print(f"Skipped {len(in_degree) - len(ordered)} classes on a subclass cycle")
+        return ordered
 
 
 def format_label(label):
@@ -77,6 +82,8 @@ def format_label(label):
     return "_".join(result)
 
 def get_used_annotation_properties(source_cls):
+    from owlready2 import rdfs
+
     onto = source_cls.namespace.ontology
     used_props = set()
     for prop in onto.annotation_properties():
@@ -92,150 +99,434 @@ def get_all_annotation_properties_to_copy(source_cls):
 
     return defined_props | used_props  
 
-def copy_annotation_properties(source_cls, target_cls):
-    for ann in get_all_annotation_properties_to_copy(source_cls):
-        ann_name = ann.python_name
-        source_values = getattr(source_cls, ann_name, [])
-        if source_values:
-            target_values = getattr(target_cls, ann_name, [])
-            for val in source_values:
-                if val not in target_values:
-                    target_values.append(val)
-
-def preserve_valid_object_properties(onto_base, onto_import, cls_map, base_iri, iri_objprop_counter):
+def get_annotations_to_copy(source_cls, labels):
+    # [(property_iri, [(is_resource, value)])] for the copy of source_cls whose
+    # rdfs:label already holds `labels`; values the copy has are skipped, as
+    # appending to the target's annotation lists did. Properties go by IRI so
+    # the result does not depend on set order.
+    from owlready2 import rdfs
+
+    props = source_cls.namespace.world._props
+    by_name = {ann.python_name: ann for ann in get_all_annotation_properties_to_copy(source_cls)}
+    annotations = []
+    for ann in sorted((props.get(name, ann) for name, ann in by_name.items()), key=lambda prop: prop.iri):
+        target_values = list(labels) if ann is rdfs.label else []
+        values = []
+        for val in getattr(source_cls, ann.python_name, []):
+            if val not in target_values:
+                target_values.append(val)
+                values.append((True, val.iri) if hasattr(val, "storid") else (False, val))
+        if values:
+            annotations.append((ann.iri, values))
+    return annotations
+
+def extract_branch_table(subclass_index, import_class, get_annotations=get_annotations_to_copy):
+    # Everything one task copies, as picklable rows in creation order:
+    # (iri, name, parent_iris, labels, annotations)
+    all_import_classes = {import_class} | subclass_index.get_all_subclasses(import_class)
+    table = []
+    for cls in subclass_index.topological_sort(all_import_classes):
+        if cls.label:
+            labels = [format_label(label) for label in cls.label]
+        elif not cls.name.isdigit():
+            labels = [format_label(cls.name)]
+        else:
+            labels = []
+        parent_iris = [p.iri for p in subclass_index.parents.get(cls, ())]
+        table.append((cls.iri, cls.name, parent_iris, labels, get_annotations(cls, labels)))
+    return table
+
+def commit_branch_table(onto_base, table, base_parent, cls_map, base_iri, allocator):
+    # Create the rows of one branch table under base_parent; cls_map maps
+    # import IRIs to the classes created so far (this and earlier tasks).
+    from owlready2 import Thing
+
+    world = onto_base.world
+    new_classes = []
     with onto_base:
-        for prop in onto_import.object_properties():
-            domains = list(prop.domain)
-            ranges = list(prop.range)
-            domain_ok = all((d in cls_map or d in onto_base.classes()) for d in domains)
-            range_ok = all((r in cls_map or r in onto_base.classes()) for r in ranges)
-            if domain_ok and range_ok:
-                new_prop = types.new_class(prop.name, (ObjectProperty,))
-                new_prop.namespace = onto_base
-                iri_suffix = f"R{iri_objprop_counter:05d}"
-                new_prop.iri = base_iri + iri_suffix
-                iri_objprop_counter += 1
-                new_prop.domain = [cls_map.get(d, d) for d in domains]
-                new_prop.range = [cls_map.get(r, r) for r in ranges]
-                new_prop.label = [prop.name]
-                if hasattr(prop, 'comment') and prop.comment:
-                    new_prop.comment = list(prop.comment)
-                new_prop.comment.append(f"Original IRI: {prop.iri}")
-                print(f"Created and preserved: {new_prop.name} ({new_prop.iri})")
-    return iri_objprop_counter
-
-def preserve_valid_data_properties(onto_base, onto_import, cls_map, base_iri, iri_dataprop_counter):
+        for iri, name, parent_iris, labels, annotations in table:
+            if not new_classes:
+                new_cls = types.new_class(name, (base_parent,))
+            else:
+                parent_classes = [cls_map[p] for p in parent_iris if p in cls_map] or [Thing]
+                new_cls = types.new_class(name, tuple(parent_classes))
+
+            new_cls.iri = base_iri + f"{allocator.next_id():05d}"
+
+            # Label, then the copied annotations
+            for label in labels:
+                new_cls.label.append(label)
+            for prop_iri, values in annotations:
+                prop = world._abbreviate(prop_iri)
+                for is_resource, value in values:
+                    if is_resource:
+                        onto_base._add_obj_triple_spo(new_cls.storid, prop, world._abbreviate(value))
+                    else:
+                        onto_base._add_data_triple_spod(new_cls.storid, prop, *world._to_rdf(value))
+            new_cls.comment.append(f"Original IRI: {iri}")
+            cls_map[iri] = new_cls
+            new_classes.append(new_cls)
+    return new_classes
+
+def group_overlapping_tasks(branches):
+    # Union-find over task indices: tasks whose branches share a class end up
+    # in one group, disjoint branches in separate groups
+    group_of = list(range(len(branches)))
+
+    def find(i):
+        while group_of[i] != i:
+            group_of[i] = group_of[group_of[i]]
+            i = group_of[i]
+        return i
+
+    owner = {}
+    for i, branch in enumerate(branches):
+        for cls in branch:
+            j = owner.setdefault(cls, i)
+            if j != i:
+                group_of[find(i)] = find(j)
+    groups = defaultdict(list)
+    for i in range(len(branches)):
+        groups[find(i)].append(i)
+    return sorted(groups.values())
+
+# --- worker processes --------------------------------------------------------
+
+_worker = {}
+
+def _init_extract_worker(db_path, parent_iris):
+    from owlready2 import World
+    from owl_common.ontology_cache import restore_world
+
+    world = World()
+    restore_world(world, db_path)
+    hierarchy = {world[iri]: [world[p] for p in parents] for iri, parents in parent_iris.items()}
+    _worker["world"] = world
+    _worker["index"] = SubclassIndex(hierarchy)
+
+def _extract_task_group(class_iris):
+    world = _worker["world"]
+    return [extract_branch_table(_worker["index"], world[iri]) for iri in class_iris]
+
+def extract_branch_tables_parallel(onto_import, subclass_index, import_classes, workers):
+    # Tables for all import_classes (None entries are skipped), extracted by
+    # a process pool one group of overlapping branches per job. The workers
+    # restore one snapshot of this process' quadstore and reuse its
+    # hierarchy, so the import is neither reparsed nor reasoned again.
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    import tempfile
+    from owl_common.ontology_cache import snapshot_world
+
+    todo = [i for i, cls in enumerate(import_classes) if cls is not None]
+    branches = [{import_classes[i]} | subclass_index.get_all_subclasses(import_classes[i]) for i in todo]
+    groups = group_overlapping_tasks(branches)
+    print(f"Extracting {len(todo)} branches in {len(groups)} independent groups with {workers} workers")
+
+    parent_iris = {cls.iri: [p.iri for p in parents] for cls, parents in subclass_index.parents.items()}
+    tables = [None] * len(import_classes)
+    with tempfile.TemporaryDirectory(prefix="owl-merge-") as tmp:
+        db_path = os.path.join(tmp, "import.sqlite3")
+        snapshot_world(onto_import.world, db_path)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_extract_worker, initargs=(db_path, parent_iris)) as pool:
+            jobs = [(group, pool.submit(_extract_task_group, [import_classes[todo[k]].iri for k in group]))
+                    for group in groups]
+            for group, job in jobs:
+                for k, table in zip(group, job.result()):
+                    tables[todo[k]] = table
+    return tables
+
+def build_class_index(onto_base, cls_map):
+    # IRIs of every class a preserved property may point at: the base classes
+    # (merged branches included) and the import classes they were copied from
+    return {cls.iri for cls in onto_base.classes()} | set(cls_map)
+
+def partition_properties(props, class_index, check_range=True):
+    # One pass over the import properties: (prop, domains, ranges) for those
+    # whose classes are all in the index, (prop, reason) for the rest
+    accepted, rejected = [], []
+    for prop in props:
+        domains = list(prop.domain)
+        ranges = list(prop.range)
+        reasons = []
+        missing = [d for d in domains if getattr(d, "iri", None) not in class_index]
+        if missing:
+            reasons.append("domain not in base: " + ", ".join(str(d) for d in missing))
+        missing = [r for r in ranges if getattr(r, "iri", None) not in class_index] if check_range else []
+        if missing:
+            reasons.append("range not in base: " + ", ".join(str(r) for r in missing))
+        if reasons:
+            rejected.append((prop, "; ".join(reasons)))
+        else:
+            accepted.append((prop, domains, ranges))
+    return accepted, rejected
+
+def print_property_summary(kind, created, rejected):
+    print(f"{kind}: {len(created)} preserved, {len(rejected)} rejected")
+    for prop, new_prop in created:
+        log(f"  + {prop.name} -> {new_prop.iri}")
+    for prop, reason in rejected:
+        log(f"  - {prop.name}: {reason}")
+
+def preserve_valid_object_properties(onto_base, onto_import, cls_map, base_iri, allocator, class_index=None):
+    from owlready2 import ObjectProperty
+
+    class_index = build_class_index(onto_base, cls_map) if class_index is None else class_index
+    accepted, rejected = partition_properties(onto_import.object_properties(), class_index)
+    created = []
     with onto_base:
-        for prop in onto_import.data_properties():
-            domains = list(prop.domain)
-            if all((d in cls_map or d in onto_base.classes()) for d in domains):
-                new_prop = types.new_class(prop.name, (DataProperty,))
-                new_prop.namespace = onto_base
-                iri_suffix = f"D{iri_dataprop_counter:05d}"
-                new_prop.iri = base_iri + iri_suffix
-                iri_dataprop_counter += 1
-                new_prop.domain = [cls_map.get(d, d) for d in domains]
-                print('data property range')
-                print(prop.range)
-                new_prop.range = list(prop.range)
-                new_prop.label = [prop.name]
-                if hasattr(prop, 'comment') and prop.comment:
-                    new_prop.comment = list(prop.comment)
-                new_prop.comment.append(f"Original IRI: {prop.iri}")
-                print(f"Created DataProperty: {new_prop.name} ({new_prop.iri})")
-    return iri_dataprop_counter
-
-def merge_importOnto_importClass_to_ontoBase(onto_base_path, import_ontology_path, merge_tasks, base_iri, output_dir, final_merged_file):
-    # Load base ontology
-    onto_base = get_ontology(onto_base_path).load()
-
-    # Load import ontology
-    onto_import = get_ontology(import_ontology_path).load()
+        for prop, domains, ranges in accepted:
+            new_prop = types.new_class(prop.name, (ObjectProperty,))
+            new_prop.namespace = onto_base
+            iri_suffix = f"R{allocator.next_id('R'):05d}"
+            new_prop.iri = base_iri + iri_suffix
+            new_prop.domain = [cls_map.get(d.iri) or onto_base.world[d.iri] for d in domains]
+            new_prop.range = [cls_map.get(r.iri) or onto_base.world[r.iri] for r in ranges]
+            new_prop.label = [prop.name]
+            if hasattr(prop, 'comment') and prop.comment:
+                new_prop.comment = list(prop.comment)
+            new_prop.comment.append(f"Original IRI: {prop.iri}")
+            created.append((prop, new_prop))
+    print_property_summary("Object properties", created, rejected)
+
+def preserve_valid_data_properties(onto_base, onto_import, cls_map, base_iri, allocator, class_index=None):
+    from owlready2 import DataProperty
+
+    class_index = build_class_index(onto_base, cls_map) if class_index is None else class_index
+    # data property ranges are datatypes, only the domains have to be in the base
+    accepted, rejected = partition_properties(onto_import.data_properties(), class_index, check_range=False)
+    created = []
+    with onto_base:
+        for prop, domains, ranges in accepted:
+            new_prop = types.new_class(prop.name, (DataProperty,))
+            new_prop.namespace = onto_base
+            iri_suffix = f"D{allocator.next_id('D'):05d}"
+            new_prop.iri = base_iri + iri_suffix
+            new_prop.domain = [cls_map.get(d.iri) or onto_base.world[d.iri] for d in domains]
+            new_prop.range = ranges
+            new_prop.label = [prop.name]
+            if hasattr(prop, 'comment') and prop.comment:
+                new_prop.comment = list(prop.comment)
+            new_prop.comment.append(f"Original IRI: {prop.iri}")
+            created.append((prop, new_prop))
+    print_property_summary("Data properties", created, rejected)
+
+def save_task_delta(onto_base, new_classes, path, fmt="rdfxml"):
+    # Only what one task added: the ontology header and every statement about
+    # the new classes (plus any blank nodes they reference)
+    from owl_common.ontology_writer import save_subjects
+
+    save_subjects(onto_base, new_classes, path, fmt)
+
+def checkpoint_paths(output_dir, final_merged_file):
+    prefix = os.path.join(output_dir, f"{final_merged_file}.checkpoint")
+    return f"{prefix}.owl", f"{prefix}.json"
+
+def tasks_digest(merge_tasks):
+    import hashlib
+
+    return hashlib.sha256(json.dumps(merge_tasks, sort_keys=True).encode()).hexdigest()
+
+def save_checkpoint(onto_base, output_dir, final_merged_file, merge_tasks, completed, allocator, cls_map):
+    owl_path, state_path = checkpoint_paths(output_dir, final_merged_file)
+    onto_base.save(file=f"{owl_path}.tmp", format="rdfxml")
+    os.replace(f"{owl_path}.tmp", owl_path)
+    allocator.record(owl_path)
+    state = {
+        "tasks": tasks_digest(merge_tasks),
+        "completed": completed,
+        "cls_map": {iri: new_cls.iri for iri, new_cls in cls_map.items()},
+    }
+    with open(f"{state_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{state_path}.tmp", state_path)
+    print(f"Checkpoint after task {completed}: {owl_path}")
+
+def base_allocator(onto_base, base_iri, onto_base_path=None, cache_dir=None):
+    # IRI counters continue from the base ontology's high-water marks; with the
+    # file it was loaded from, the full scan only runs when the file has no
+    # index yet (in cache_dir if given)
+    from owl_common.iri_allocator import IRIAllocator, ontology_scans
+
+    return IRIAllocator(onto_base_path, base_iri, ontology_scans(onto_base, base_iri), cache_dir)
+
+def merge_branches(onto_base, onto_import, import_ontology_path, merge_tasks, base_iri, allocator, reasoning="full", cache_dir=None,
+                   workers=1, cls_map=None, completed=0, after_task=None):
+    # Merge the task branches and the valid properties of onto_import into the
+    # in-memory onto_base; nothing is saved here. onto_import is a loaded
+    # ontology or a ScannedModule of the streamed RDF/XML. after_task(task_number,
+    # task, new_classes) runs after every task (per-task outputs, checkpoints).
+    # Returns {import class IRI: merged class}.
+    from owl_common.vocabularies import load_skos
+    from owl_common.reasoning import class_hierarchy
+    from owl_common.rdfxml_scanner import ScannedModule
+
+    stream_import = isinstance(onto_import, ScannedModule)
+    cls_map = {} if cls_map is None else cls_map
 
     # Load SKOS ontology and define skos:definition as AnnotationProperty
-    skos = get_ontology("http://www.w3.org/2004/02/skos/core").load()
+    from owlready2 import AnnotationProperty
+
+    skos = load_skos(onto_base.world)
     with skos:
         class definition(AnnotationProperty):
             namespace = skos
 
-    with onto_import:
-        sync_reasoner()
-
-    # Initialize IRI counter
-    iri_counter = get_existing_max_id(onto_base, base_iri) + 1
-    print(f"Starting IRI counter from: {iri_counter}")
-    iri_objprop_counter = get_existing_max_objprop_id(onto_base, base_iri) + 1
-    iri_dataprop_counter = get_existing_max_dataprop_id(onto_base, base_iri) + 1
-
-    cls_map = {}
+    # Class hierarchy of the import ontology under the chosen reasoning mode
+    with phase("reason") as p:
+        if stream_import:
+            hierarchy = onto_import.hierarchy
+        else:
+            task_roots = [cls for cls in (onto_import.search_one(iri=task["import_class_iri"]) for task in merge_tasks) if cls]
+            hierarchy = class_hierarchy(onto_import, import_ontology_path, reasoning, roots=task_roots, cache_dir=cache_dir)
+        subclass_index = SubclassIndex(hierarchy)
+        p.items = len(hierarchy)
+
+    # Branch tables: extracted up front by worker processes, or per task below
+    import_classes = [onto_import.search_one(iri=task["import_class_iri"]) if task_number > completed else None
+                      for task_number, task in enumerate(merge_tasks, 1)]
+    tables = [None] * len(merge_tasks)
+    if workers > 1 and not stream_import:
+        with phase("build", items=len(merge_tasks) - completed):
+            tables = extract_branch_tables_parallel(onto_import, subclass_index, import_classes, workers)
 
     # Process each task
-    for task in merge_tasks:
+    for task_number, task in enumerate(merge_tasks, 1):
+        if task_number <= completed:
+            continue
         import_class_iri = task["import_class_iri"]
         base_parent_iri = task["base_parent_iri"]
-        output_file = task["output_file"]
 
-        import_class = onto_import.search_one(iri=import_class_iri)
+        import_class = import_classes[task_number - 1]
         if not import_class:
             print(f"Class not found in import ontology: {import_class_iri}")
             continue
 
-        all_import_classes = {import_class} | get_all_subclasses(import_class)
-        sorted_classes = topological_sort(all_import_classes)
-
-        with onto_base:
-            for cls in sorted_classes:
-                if cls == import_class:
-                    base_parent = onto_base.search_one(iri=base_parent_iri)
-                    if not base_parent:
-                        print(f"Parent class not found in base ontology: {base_parent_iri}")
-                        break
-                    new_cls = types.new_class(cls.name, (base_parent,))
-                else:
-                    original_parents = [p for p in cls.is_a if p in cls_map]
-                    parent_classes = [cls_map[p] for p in original_parents] or [Thing]
-                    new_cls = types.new_class(cls.name, tuple(parent_classes))
-
-                new_cls.iri = base_iri + f"{iri_counter:05d}"
-                iri_counter += 1
-                
-                # Label
-                if cls.label:
-                    for label in cls.label:
-                        new_cls.label.append(format_label(label))
-                elif not cls.name.isdigit():
-                    new_cls.label.append(format_label(cls.name))
-
-                # Copy annotations
-                copy_annotation_properties(cls, new_cls)
-                new_cls.comment.append(f"Original IRI: {cls.iri}")
-                cls_map[cls] = new_cls
-                
-
-        onto_base.save(file=f"{output_dir}/{output_file}", format="rdfxml")
-        print(f"Saved: {output_file}")
-    
-
-    # Preserve valid object properties
-    iri_objprop_counter = preserve_valid_object_properties(onto_base, onto_import, cls_map, base_iri, iri_objprop_counter)
-    # Preserve valid data properties
-    iri_dataprop_counter = preserve_valid_data_properties(onto_base, onto_import, cls_map, base_iri, iri_dataprop_counter)
-
-    print("Object properties before save:")
+        with phase("build") as p:
+            table = tables[task_number - 1]
+            if table is None and stream_import:
+                table = extract_branch_table(subclass_index, import_class, onto_import.get_annotations_to_copy)
+            elif table is None:
+                table = extract_branch_table(subclass_index, import_class)
+
+            base_parent = onto_base.search_one(iri=base_parent_iri)
+            if base_parent:
+                new_classes = commit_branch_table(onto_base, table, base_parent, cls_map, base_iri, allocator)
+            else:
+                print(f"Parent class not found in base ontology: {base_parent_iri}")
+                new_classes = []
+            p.items = len(new_classes)
+
+        if after_task:
+            after_task(task_number, task, new_classes)
+
+    with phase("build"):
+        # Membership index of base and merged classes, built once for both property kinds
+        class_index = build_class_index(onto_base, cls_map)
+        # Preserve valid object properties
+        preserve_valid_object_properties(onto_base, onto_import, cls_map, base_iri, allocator, class_index)
+        # Preserve valid data properties
+        preserve_valid_data_properties(onto_base, onto_import, cls_map, base_iri, allocator, class_index)
+
+    log("Object properties before save:")
     for prop in onto_base.object_properties():
-        print(f"- {prop.name} | domain: {[d.name for d in prop.domain]} | range: {[r.name for r in prop.range]}")
+        log(f"- {prop.name} | domain: {[d.name for d in prop.domain]} | range: {[r.name for r in prop.range]}")
 
-    print("Data properties before save:")
+    log("Data properties before save:")
     for prop in onto_base.data_properties():
-        print(f"- {prop.name} | domain: {[d.name for d in prop.domain]} | range: {[r for r in prop.range]}")
+        log(f"- {prop.name} | domain: {[d.name for d in prop.domain]} | range: {[r for r in prop.range]}")
+    return cls_map
+
+def load_import_ontology(import_ontology_path, merge_tasks, world, cache_dir=None, stream_import=False):
+    # A streamed import is never loaded: only the requested branches and the
+    # properties are read from its RDF/XML
+    from owl_common.ontology_cache import load_ontologies
+    from owl_common.rdfxml_scanner import ScannedModule
+
+    if stream_import:
+        onto_import = ScannedModule(import_ontology_path, [task["import_class_iri"] for task in merge_tasks], world)
+        print(f"Scanned {len(onto_import.classes)} classes of the requested branches from: {import_ontology_path}")
+        return onto_import
+    onto_import, = load_ontologies([import_ontology_path], cache_dir, world)
+    return onto_import
+
+def merge_importOnto_importClass_to_ontoBase(onto_base_path, import_ontology_path, merge_tasks, base_iri, output_dir, final_merged_file, cache_dir=None, reasoning="full",
+                                             delta_outputs=False, checkpoint_every=0, resume=False, workers=1, stream_import=False,
+                                             fmt="rdfxml", serialize_workers=1):
+    from owl_common.ontology_cache import load_ontologies
+    from owl_common.ontology_writer import save_ontology
+    from owl_common.vocabularies import register_local_vocabularies
+
+    # Resolve standard vocabularies (SKOS) from the bundled copies, never the network
+    register_local_vocabularies()
+
+    # Resume from the last checkpoint of an interrupted run with the same tasks
+    state = None
+    checkpoint_owl, checkpoint_state = checkpoint_paths(output_dir, final_merged_file)
+    if resume and os.path.exists(checkpoint_state):
+        with open(checkpoint_state, encoding="utf-8") as f:
+            state = json.load(f)
+        if state["tasks"] != tasks_digest(merge_tasks):
+            raise ValueError(f"Checkpoint {checkpoint_state} was written for a different task list")
+        onto_base_path = checkpoint_owl
+        print(f"Resuming after task {state['completed']} from: {checkpoint_owl}")
+
+    # Load base and import ontologies (from the parsed cache when enabled)
+    if stream_import and reasoning != "none":
+        raise ValueError("Streaming the import ontology uses its asserted hierarchy; use reasoning='none'")
+    # A checkpoint is new on every resume, so it is never stored in the cache
+    with phase("read"):
+        if stream_import:
+            onto_base, = load_ontologies([onto_base_path], None if state else cache_dir)
+            onto_import = load_import_ontology(import_ontology_path, merge_tasks, onto_base.world, stream_import=True)
+        elif state:
+            onto_import, = load_ontologies([import_ontology_path], cache_dir)
+            onto_base, = load_ontologies([onto_base_path], world=onto_import.world)
+        else:
+            onto_base, onto_import = load_ontologies([onto_base_path, import_ontology_path], cache_dir)
 
-    
-    onto_base.save(file=f"{output_dir}/{final_merged_file}", format="rdfxml")
+    allocator = base_allocator(onto_base, base_iri, onto_base_path, cache_dir)
+    print(f"Starting IRI counter from: {allocator.high_water('') + 1}")
+
+    cls_map = {}
+    completed = 0
+    if state:
+        cls_map = {iri: onto_base.world[new_iri] for iri, new_iri in state["cls_map"].items()}
+        completed = state["completed"]
+
+    def save_task_output(task_number, task, new_classes):
+        output_file = task["output_file"]
+        with phase("serialize"):
+            if delta_outputs:
+                save_task_delta(onto_base, new_classes, f"{output_dir}/{output_file}", fmt)
+                print(f"Saved: {output_file} ({len(new_classes)} classes added)")
+            else:
+                save_ontology(onto_base, f"{output_dir}/{output_file}", fmt, serialize_workers)
+                print(f"Saved: {output_file}")
+
+            if checkpoint_every and task_number % checkpoint_every == 0 and task_number < len(merge_tasks):
+                save_checkpoint(onto_base, output_dir, final_merged_file, merge_tasks, task_number, allocator, cls_map)
+
+    merge_branches(onto_base, onto_import, import_ontology_path, merge_tasks, base_iri, allocator, reasoning, cache_dir,
+                   workers, cls_map, completed, save_task_output)
+
+    with phase("serialize"):
+        save_ontology(onto_base, f"{output_dir}/{final_merged_file}", fmt, serialize_workers)
     print(f"Saved: {final_merged_file}")
+    allocator.record(f"{output_dir}/{final_merged_file}")
+    allocator.close()
+
+    # The run finished, so its checkpoint must not be resumed again
+    for path in (checkpoint_owl, checkpoint_state):
+        if os.path.exists(path):
+            os.remove(path)
     
 
 if __name__ == "__main__":
-    
+    from owl_common.ontology_writer import add_output_arguments
+    from owl_common.reasoning import REASONING_MODES
+
     parser = argparse.ArgumentParser(description="Merge selected branches from import ontology into base ontology.")
     parser.add_argument("--base", required=True, help="Path to base ontology OWL file")
     parser.add_argument("--import_onto", required=True, help="Path to import ontology OWL file")
@@ -243,8 +534,28 @@ if __name__ == "__main__":
     parser.add_argument("--base_iri", required=True, help="Base IRI for the merged ontology")
     parser.add_argument("--output_dir", required=True, help="Directory to save intermediate and final outputs")
     parser.add_argument("--final_output", required=True, help="Filename for final merged OWL file")
+    parser.add_argument("--cache-dir", help="Optional: reuse parsed ontologies and inferred class hierarchies cached in this directory and keep IRI indexes there instead of next to the files (keyed by file content)")
+    parser.add_argument("--reasoning", choices=REASONING_MODES, default="full",
+                        help="full: reasoner over the whole import ontology (default); module: reasoner over the requested branches only; "
+                             "closure: asserted parents plus the named parts of equivalent-class definitions; none: asserted hierarchy")
+
+    parser.add_argument("--delta-outputs", action="store_true",
+                        help="Write each task's output_file with only the classes that task added; the full ontology is saved once at the end")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="Optional: save the merged ontology and progress every N tasks so a failed run can be resumed")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint in output_dir")
+    parser.add_argument("--stream-import", action="store_true",
+                        help="Read only the requested branches and the properties from the import RDF/XML instead of loading it (requires --reasoning none)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Extract the import branches in this many worker processes (output is identical for any value)")
+    add_output_arguments(parser)
+    add_instrumentation_arguments(parser)
 
     args = parser.parse_args()
+    if args.stream_import and args.reasoning != "none":
+        parser.error("--stream-import uses the asserted hierarchy; combine it with --reasoning none")
+    instrumentation = configure_from_args("selective_owl_merging", args)
+    preload("owlready2", *(("rdflib",) if args.reasoning == "module" else ()))
 
     
     with open(args.tasks, "r", encoding="utf-8") as f:
@@ -256,5 +567,15 @@ if __name__ == "__main__":
         merge_tasks=merge_tasks,
         base_iri=args.base_iri,
         output_dir=args.output_dir,
-        final_merged_file=args.final_output
+        final_merged_file=args.final_output,
+        cache_dir=args.cache_dir,
+        reasoning=args.reasoning,
+        delta_outputs=args.delta_outputs,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+        workers=args.workers,
+        stream_import=args.stream_import,
+        fmt=args.format,
+        serialize_workers=args.serialize_workers
     )
+    instrumentation.close()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The tools import owl_common from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EXAMPLE_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example_data")
@@ -0,0 +1,142 @@
+import multiprocessing
+
+from owl_common import iri_allocator
+from owl_common.iri_allocator import IRIAllocator
+
+BASE_IRI = "https://example.org/onto#"
+
+
+def counting_scans(highest, calls):
+    # Scans that report `highest` for every prefix and count how often they run
+    def scan(prefix):
+        calls.append(prefix)
+        return highest
+    return {prefix: (lambda prefix=prefix: scan(prefix)) for prefix in ("", "R", "D")}
+
+
+def make_owl(tmp_path, text="<rdf:RDF/>"):
+    path = tmp_path / "onto.owl"
+    path.write_text(text)
+    return str(path)
+
+
+def test_without_cache_dir_index_is_a_sidecar(tmp_path):
+    owl_path = make_owl(tmp_path)
+    calls = []
+    IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls)).close()
+    with IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls)) as allocator:
+        assert allocator.next_id() == 19
+    assert calls == ["", "R", "D"]
+    assert (tmp_path / "onto.owl.iri-index.json").exists()
+
+
+def test_read_only_directory_uses_user_cache(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    owl_path = make_owl(data_dir)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setattr(iri_allocator, "_writable", lambda directory: directory != str(data_dir))
+    calls = []
+    IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls)).close()
+    IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls)).close()
+    assert calls == ["", "R", "D"]
+    assert sorted(p.name for p in data_dir.iterdir()) == ["onto.owl"]
+    assert any(p.name.startswith("iri-index-") for p in (tmp_path / "xdg" / "owl-excel-tool").iterdir())
+
+
+def test_nothing_writable_stays_in_memory(tmp_path, monkeypatch):
+    owl_path = make_owl(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setattr(iri_allocator, "_writable", lambda directory: False)
+    calls = []
+    for _ in range(2):
+        with IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls)) as allocator:
+            assert allocator.next_id() == 19
+            allocator.record(owl_path)
+    assert calls == ["", "R", "D"] * 2
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["onto.owl"]
+
+
+def test_index_skips_scan_until_file_changes(tmp_path):
+    owl_path = make_owl(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    calls = []
+    IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls), cache_dir).close()
+    IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls), cache_dir).close()
+    assert calls == ["", "R", "D"]
+
+    # An edited file has another digest, so its stale marks are not used
+    make_owl(tmp_path, "<rdf:RDF><edited/></rdf:RDF>")
+    with IRIAllocator(owl_path, BASE_IRI, counting_scans(40, calls), cache_dir) as allocator:
+        assert allocator.next_id() == 41
+    assert calls == ["", "R", "D"] * 2
+
+
+def test_leases_keep_open_runs_apart(tmp_path):
+    owl_path = make_owl(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    first = IRIAllocator(owl_path, BASE_IRI, counting_scans(18, []), cache_dir, block_size=10)
+    second = IRIAllocator(owl_path, BASE_IRI, counting_scans(18, []), cache_dir, block_size=10)
+    assert first.next_id() == 19
+    assert second.next_id() == 29
+    assert second.next_id("R") == 19  # prefixes are leased separately
+    first.close()
+    third = IRIAllocator(owl_path, BASE_IRI, counting_scans(18, []), cache_dir, block_size=10)
+    assert third.next_id() == 39  # released leases still fence while one is held
+    second.close()
+    third.close()
+
+    # Once every run has closed, the next one starts from the file's marks again
+    with IRIAllocator(owl_path, BASE_IRI, counting_scans(18, []), cache_dir) as allocator:
+        assert allocator.next_id() == 19
+
+
+def test_record_indexes_output(tmp_path):
+    owl_path = make_owl(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    with IRIAllocator(owl_path, BASE_IRI, counting_scans(18, []), cache_dir) as allocator:
+        for _ in range(5):
+            allocator.next_id()
+        output = tmp_path / "out.owl"
+        output.write_text("<rdf:RDF><saved/></rdf:RDF>")
+        allocator.record(str(output))
+
+    calls = []
+    with IRIAllocator(str(output), BASE_IRI, counting_scans(0, calls), cache_dir) as allocator:
+        assert allocator.next_id() == 24
+    assert calls == []
+
+
+def test_unwritable_cache_falls_back_to_memory(tmp_path):
+    owl_path = make_owl(tmp_path)
+    cache_dir = tmp_path / "not-a-directory"
+    cache_dir.write_text("")
+    calls = []
+    with IRIAllocator(owl_path, BASE_IRI, counting_scans(18, calls), str(cache_dir)) as allocator:
+        assert allocator.next_id() == 19
+        assert allocator.next_id() == 20
+        allocator.record(owl_path)
+    assert calls == ["", "R", "D"]
+
+
+def _allocate(owl_path, cache_dir, count, barrier, results):
+    # One run: allocate, then hold the leases until every run has allocated
+    with IRIAllocator(owl_path, BASE_IRI, counting_scans(18, []), cache_dir, block_size=7) as allocator:
+        results.put([allocator.next_id() for _ in range(count)])
+        barrier.wait()
+
+
+def test_concurrent_runs_get_disjoint_numbers(tmp_path):
+    owl_path = make_owl(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    barrier = multiprocessing.Barrier(4)
+    results = multiprocessing.Queue()
+    runs = [multiprocessing.Process(target=_allocate, args=(owl_path, cache_dir, 50, barrier, results))
+            for _ in range(4)]
+    for run in runs:
+        run.start()
+    numbers = [number for _ in runs for number in results.get(timeout=60)]
+    for run in runs:
+        run.join()
+    assert len(set(numbers)) == len(numbers) == 200
+    assert min(numbers) == 19
@@ -0,0 +1,46 @@
+import gzip
+import io
+import os
+
+import pytest
+
+from conftest import EXAMPLE_DATA
+from owl_common.ontology_writer import save_ontology
+
+PACO = os.path.join(EXAMPLE_DATA, "selective_owl_merging_example", "PACO_V02.owl")
+
+
+@pytest.fixture(scope="module")
+def paco():
+    from owlready2 import World
+
+    world = World()
+    yield world.get_ontology(PACO).load()
+    world.close()
+
+
+@pytest.fixture(scope="module")
+def owlready2_ntriples(paco):
+    f = io.BytesIO()
+    paco.save(file=f, format="ntriples")
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("extension", [".nt", ".nt.gz"])
+def test_ntriples_match_owlready2(tmp_path, paco, owlready2_ntriples, workers, extension):
+    # A small chunk_size splits the ontology into several partitions per table
+    path = str(tmp_path / f"paco{extension}")
+    save_ontology(paco, path, "ntriples", workers, chunk_size=500)
+    with (gzip.open if extension.endswith(".gz") else open)(path, "rb") as f:
+        assert f.read() == owlready2_ntriples
+
+
+def test_output_does_not_depend_on_workers(tmp_path, paco):
+    outputs = []
+    for workers in (1, 3):
+        path = str(tmp_path / f"paco-{workers}.nt.gz")
+        save_ontology(paco, path, "ntriples", workers, chunk_size=500)
+        with open(path, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
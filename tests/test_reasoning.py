@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import EXAMPLE_DATA
+from owl_common.reasoning import _ancestor_sets, asserted_hierarchy, closure_hierarchy
+
+PACO = os.path.join(EXAMPLE_DATA, "selective_owl_merging_example", "PACO_V02.owl")
+
+
+def load_paco():
+    from owlready2 import World
+
+    world = World()
+    return world, world.get_ontology(PACO).load()
+
+
+def ancestors_by_iri(hierarchy):
+    # class IRI -> IRIs of all its named ancestors except owl:Thing
+    ancestors = _ancestor_sets(hierarchy)
+    return {cls.iri: {a.iri for a in found if a.iri != "http://www.w3.org/2002/07/owl#Thing"}
+            for cls, found in ancestors.items()}
+
+
+def test_closure_keeps_asserted_ancestors():
+    world, onto = load_paco()
+    asserted = ancestors_by_iri(asserted_hierarchy(onto))
+    closure = ancestors_by_iri(closure_hierarchy(onto))
+    for iri, found in asserted.items():
+        assert found <= closure[iri], iri
+    world.close()
+
+
+def test_closure_adds_named_conjuncts_of_definitions():
+    from owlready2 import And, ThingClass
+
+    world, onto = load_paco()
+    closure = ancestors_by_iri(closure_hierarchy(onto))
+    defined = 0
+    for cls in onto.classes():
+        for eq in cls.equivalent_to:
+            if isinstance(eq, And):
+                for part in eq.Classes:
+                    if isinstance(part, ThingClass) and part is not cls:
+                        defined += 1
+                        assert part.iri in closure[cls.iri], (cls, part)
+    assert defined
+    world.close()
+
+
+def test_reasoned_hierarchy_classifies_the_ontologys_world(monkeypatch):
+    import owlready2
+    from owl_common.reasoning import reasoned_hierarchy
+
+    classified = []
+    monkeypatch.setattr(owlready2, "sync_reasoner", lambda x=None, **kwargs: classified.append(x))
+    world, onto = load_paco()
+    reasoned_hierarchy(onto)
+    assert classified == [world]
+    world.close()
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="the reasoner needs Java")
+def test_closure_is_contained_in_reasoned_hierarchy():
+    from owl_common.reasoning import reasoned_hierarchy
+
+    world, onto = load_paco()
+    closure = ancestors_by_iri(closure_hierarchy(onto))
+    reasoned_world, reasoned_onto = load_paco()
+    reasoned = ancestors_by_iri(reasoned_hierarchy(reasoned_onto))
+    for iri, found in closure.items():
+        assert found <= reasoned.get(iri, set()), iri
+    world.close()
+    reasoned_world.close()
@@ -0,0 +1,110 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import EXAMPLE_DATA
+from excel2owl.excel2owl_class_annotations import build_ontology_with_standard_annotations, extract_hierarchy_tables
+from excel2owl.excel2owl_properties import add_properties_from_txt
+from owl_common.sheet_validation import (SheetValidationError, cyclic_edges, validate_class_tables,
+                                         validate_relation_rows)
+
+URI = "https://example.org/onto#"
+
+
+def class_rows(*paths):
+    # One level_N row per path of labels, top level first
+    return [{f"level_{level}": label for level, label in enumerate(path, 1)} for path in paths]
+
+
+def issues_by_check(report):
+    return {issue["check"]: issue for issue in report.issues}
+
+
+def test_cyclic_edges_keeps_only_the_cycle():
+    # 0 -> 1 -> 2 -> 0 is a cycle; 3 hangs below it and 2 also has the root 4 as parent
+    children = np.array([0, 1, 2, 3, 2])
+    parents = np.array([1, 2, 0, 0, 4])
+    assert cyclic_edges(children, parents).tolist() == [True, True, True, False, False]
+
+
+def test_cyclic_edges_of_a_tree_is_empty():
+    children = np.array([1, 2, 3])
+    parents = np.array([0, 0, 1])
+    assert not cyclic_edges(children, parents).any()
+
+
+def test_parent_cycle_reports_its_rows():
+    tables = extract_hierarchy_tables(class_rows(["Animal", "Dog"], ["Dog", "Animal"], ["Dog", "Puppy"]))
+    report = validate_class_tables(tables)
+    cycle = issues_by_check(report)["parent_cycle"]
+    assert cycle["rows"] == [1, 2]
+    assert sorted(map(tuple, cycle["values"])) == [("Animal", "Dog"), ("Dog", "Animal")]
+
+
+def test_cell_texts_formalizing_to_one_label_collide():
+    tables = extract_hierarchy_tables(class_rows(["Vitals", "Heart rate"], ["Vitals", "heart-rate"],
+                                                 ["Vitals", "HEART RATE"]))
+    report = validate_class_tables(tables)
+    collision = issues_by_check(report)["label_collision"]
+    # A difference in case alone is not a collision, so row 3 is not reported
+    assert collision["values"] == ["Heart rate", "heart-rate"]
+    assert collision["rows"] == [1, 2]
+    assert len(report.errors) == 1
+
+
+def test_relation_errors_report_their_rows():
+    rows = [
+        {"name": "has part", "property": "object property", "domain": " animal ", "range": "Dog"},
+        {"name": "", "property": "object property", "domain": "Animal", "range": "Dog"},
+        {"name": "weight", "property": "annotation", "domain": "Animal", "range": ""},
+        {"name": "eats", "property": "object property", "domain": "part of", "range": "Dog"},
+        {"name": "bites", "property": "object property", "domain": "Animal", "range": "age"},
+        {"name": "likes", "property": "object property", "domain": "Cat", "range": "Dog"},
+        {"name": "likes", "property": "object property", "domain": "Dog", "range": "Fish"},
+        {"name": "has part", "property": "data property", "domain": "Animal", "range": "string"},
+    ]
+    report = validate_relation_rows(rows, ["Animal", "Dog"], object_labels=["part of"], data_labels=["age"])
+    assert {check: issue["rows"] for check, issue in issues_by_check(report).items()} == {
+        "empty_name": [2],
+        "unknown_property_type": [3],
+        "domain_not_a_class": [4],
+        "range_not_a_class": [5],
+        "unknown_domain": [6],
+        "unknown_range": [7],
+        "property_type_clash": [1, 8],
+    }
+
+
+def test_relation_sheet_without_a_column():
+    rows = [{"name": "has part", "property": "object property", "domain": "Animal"}]
+    report = validate_relation_rows(rows, ["Animal"])
+    assert [issue["check"] for issue in report.issues] == ["missing_column"]
+    with pytest.raises(SheetValidationError):
+        report.raise_for_errors()
+
+
+@pytest.mark.parametrize("engine", ["owlready2", "rdf"])
+def test_invalid_class_sheet_writes_no_output(tmp_path, engine):
+    from owlready2 import World
+
+    output = tmp_path / "out.owl"
+    world = World()
+    with pytest.raises(SheetValidationError) as raised:
+        build_ontology_with_standard_annotations(class_rows(["Animal", "Dog"], ["Dog", "Animal"]), URI, str(output),
+                                                 engine=engine, world=world)
+    world.close()
+    assert [issue["check"] for issue in raised.value.report.errors] == ["parent_cycle"]
+    assert not output.exists()
+
+
+def test_invalid_relation_sheet_writes_no_output(tmp_path):
+    owl_path = tmp_path / "test.owl"
+    shutil.copy(os.path.join(EXAMPLE_DATA, "excel2owl_example", "test.owl"), owl_path)
+    output = tmp_path / "out.owl"
+    rows = [{"name": "has age", "property": "object property", "domain": "Person", "range": "No Such Class"}]
+    with pytest.raises(SheetValidationError) as raised:
+        add_properties_from_txt(str(owl_path), rows, str(output))
+    assert [issue["check"] for issue in raised.value.report.errors] == ["unknown_range"]
+    assert not output.exists()